@@ -0,0 +1 @@
+"""Benchmarks offline de la suite: backend OpenAI falso, herramientas y servidor MCP stub."""
@@ -0,0 +1,65 @@
+"""Compara dos reportes JSON de benchmarks.run (base vs. candidato).
+
+Uso: python -m benchmarks.compare base.json nuevo.json
+"""
+import json
+import sys
+
+# (ruta dentro del resultado, mayor es mejor)
+METRICS = [
+    ("wall_s", False),
+    ("throughput_qps", True),
+    ("throughput_cvs_per_s", True),
+    ("latency.p50_ms", False),
+    ("latency.p95_ms", False),
+    ("ttft.p50_ms", False),
+    ("shard_latency.p95_ms", False),
+    ("cold_start_s", False),
+    ("peak_rss_mb", False),
+]
+
+
+def _get(result, path):
+    value = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(base, candidate):
+    base_results = {r["scenario"]: r for r in base["results"]}
+    rows = []
+    for result in candidate["results"]:
+        previous = base_results.get(result["scenario"])
+        if previous is None:
+            continue
+        for path, higher_is_better in METRICS:
+            old, new = _get(previous, path), _get(result, path)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            rows.append((result["scenario"], path, old, new, change, better))
+    return rows
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        sys.exit(__doc__)
+    with open(argv[0]) as f:
+        base = json.load(f)
+    with open(argv[1]) as f:
+        candidate = json.load(f)
+
+    print(f"base: {base.get('revision')}  →  candidato: {candidate.get('revision')}\n")
+    print(f"{'escenario':<22}{'métrica':<24}{'base':>12}{'nuevo':>12}{'cambio':>10}")
+    for scenario, path, old, new, change, better in compare(base, candidate):
+        mark = "✅" if better else ("⚠️" if abs(change) >= 5 else "  ")
+        print(f"{scenario:<22}{path:<24}{old:>12.2f}{new:>12.2f}{change:>+9.1f}% {mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Servidor local compatible con la API de chat de OpenAI, con latencia determinista.
+
+Permite ejecutar los agentes reales (PooledOpenAIChat, Agent, Team) sin red:
+basta con apuntar OPENAI_BASE_URL a `FakeOpenAI.base_url`. Si el request trae
+herramientas, la primera vuelta responde con tool calls (una por miembro para
+las herramientas de delegación de un Team) y la siguiente con el texto final.
+
+Para probar el planificador (common/ratelimit.py) puede responder 429:
+`max_concurrent` rechaza lo que supere esa concurrencia y `error_rate` una
+fracción aleatoria de las peticiones, con `Retry-After` opcional.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DELEGATION_TOOLS = ("transfer_task_to_member", "atransfer_task_to_member", "forward_task_to_member")
+
+
+def _stub_value(name, schema):
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "boolean":
+        return False
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {}
+    if "url" in name.lower():
+        return "https://example.com/articulo"
+    return "AAPL"
+
+
+def _stub_arguments(function, member_id=None):
+    properties = (function.get("parameters") or {}).get("properties") or {}
+    args = {name: _stub_value(name, schema) for name, schema in properties.items()}
+    if member_id is not None and "member_id" in args:
+        args["member_id"] = member_id
+    return args
+
+
+def _text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+class FakeOpenAI:
+    """Backend falso: `latency` por respuesta, `token_latency` entre fragmentos del stream."""
+
+    def __init__(self, latency=0.05, token_latency=0.0, response_words=120, tools_per_turn=2,
+                 max_concurrent=None, error_rate=0.0, retry_after=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.response_words = response_words
+        self.tools_per_turn = tools_per_turn
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # 🧠 Política de respuesta
+    def reply(self, body):
+        messages = body.get("messages") or []
+        tools = [t["function"] for t in body.get("tools") or [] if t.get("type") == "function"]
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        answered = any(m.get("role") == "tool" for m in messages[last_user + 1:])
+
+        if tools and not answered:
+            delegation = [t for t in tools if t["name"] in DELEGATION_TOOLS]
+            if delegation:
+                system = " ".join(_text(m) for m in messages if m.get("role") in ("system", "developer"))
+                members = re.findall(r"- ID: (\S+)", system) or [None]
+                calls = [(delegation[0], _stub_arguments(delegation[0], member)) for member in members]
+            else:
+                calls = [(t, _stub_arguments(t)) for t in tools[:self.tools_per_turn]]
+            return {"tool_calls": [
+                {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                 "function": {"name": t["name"], "arguments": json.dumps(args)}}
+                for t, args in calls]}
+
+        prompt = _text(messages[last_user]) if last_user >= 0 else ""
+        if "candidatos" in prompt or body.get("response_format"):
+            files = list(dict.fromkeys(re.findall(r"([\w\-./]+\.pdf):", prompt)))
+            candidatos = [{"nombre": f"Candidato {i + 1}", "archivo": name, "puntaje": 100 - (i * 7) % 60,
+                           "experiencia_anos": i % 12, "skills": ["Python", "SQL"],
+                           "educacion": "Ingeniería de Sistemas", "recomendacion": "Buen match"}
+                          for i, name in enumerate(files)]
+            payload = json.dumps({"candidatos": candidatos}, ensure_ascii=False)
+            # Con response_format (salida estructurada) la API devuelve JSON puro
+            if body.get("response_format"):
+                return {"content": payload}
+            return {"content": "```json\n" + payload + "\n```"}
+        words = ("análisis " * self.response_words).split()
+        return {"content": " ".join(f"{w}{i}" for i, w in enumerate(words))}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    limited = (fake.max_concurrent is not None and fake.in_flight >= fake.max_concurrent) \
+                        or random.random() < fake.error_rate
+                    if limited:
+                        fake.rejected += 1
+                    else:
+                        fake.in_flight += 1
+                        fake.peak_in_flight = max(fake.peak_in_flight, fake.in_flight)
+                if limited:
+                    return self._rate_limited()
+                try:
+                    time.sleep(fake.latency)
+                    message = fake.reply(body)
+                    if body.get("stream"):
+                        self._stream(body, message)
+                    else:
+                        self._json(body, message)
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _rate_limited(self):
+                payload = json.dumps({"error": {"message": "Rate limit reached", "type": "requests",
+                                                "code": "rate_limit_exceeded"}}).encode()
+                self.send_response(429)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if fake.retry_after is not None:
+                    self.send_header("Retry-After", str(fake.retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _usage(self, body, message):
+                prompt_tokens = len(json.dumps(body.get("messages"))) // 4
+                completion_tokens = len(json.dumps(message)) // 4
+                return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens}
+
+            def _json(self, body, message):
+                payload = json.dumps({
+                    "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "tool_calls" if "tool_calls" in message else "stop",
+                                 "message": {"role": "assistant", "content": message.get("content"),
+                                             "tool_calls": message.get("tool_calls")}}],
+                    "usage": self._usage(body, message),
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body, message):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": body.get("model")}
+
+                def send(delta, finish=None, usage=None):
+                    chunk = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                    if usage is not None:
+                        chunk = {**base, "choices": [], "usage": usage}
+                    data = f"data: {json.dumps(chunk)}\n\n".encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+
+                send({"role": "assistant", "content": ""})
+                if "tool_calls" in message:
+                    send({"tool_calls": [{**call, "index": i} for i, call in enumerate(message["tool_calls"])]})
+                    send({}, "tool_calls")
+                else:
+                    for piece in re.findall(r"\S+\s*", message["content"]):
+                        send({"content": piece})
+                        if fake.token_latency:
+                            time.sleep(fake.token_latency)
+                    send({}, "stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    send(None, usage=self._usage(body, message))
+                data = b"data: [DONE]\n\n"
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
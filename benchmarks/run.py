@@ -0,0 +1,348 @@
+"""Harness de benchmarks offline para los tres agentes.
+
+Ejemplo:
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --scenarios screening --sizes 10,100,1000 --profile pyinstrument
+    python -m benchmarks.compare base.json bench.json
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SCENARIOS = ("orchestrate_team", "orchestrate_single", "orchestrate_fanout", "orchestrate_repeat", "screening", "maps",
+             "maps_batch")
+
+
+# 📏 Métricas
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(seconds):
+    ms = [s * 1000 for s in seconds]
+    return {"count": len(ms), "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95),
+            "mean_ms": statistics.fmean(ms) if ms else None, "max_ms": max(ms) if ms else None}
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # macOS reporta bytes, Linux KiB
+    scale = 1 / (1024 * 1024) if platform.system() == "Darwin" else 1 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class RssSampler:
+    """Muestrea el RSS del proceso en segundo plano para obtener el pico de cada escenario."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = _rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_mb())
+
+
+class Profiler:
+    """cProfile (por defecto) o pyinstrument si está instalado y se pide."""
+
+    def __init__(self, kind, top=20):
+        self.kind, self.top = kind, top
+        self.report = None
+
+    def __enter__(self):
+        if self.kind == "pyinstrument":
+            from pyinstrument import Profiler as Pyinstrument
+
+            self._profiler = Pyinstrument(async_mode="enabled")
+            self._profiler.start()
+        elif self.kind == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            self.report = {"pyinstrument": self._profiler.output_text(unicode=False, color=False)}
+        elif self.kind == "cprofile":
+            self._profiler.disable()
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+            self.report = {"cprofile": [
+                {"function": f"{Path(file).name}:{line}({name})", "ncalls": calls,
+                 "tottime_s": round(tottime, 4), "cumtime_s": round(cumtime, 4)}
+                for (file, line, name), (_, calls, tottime, cumtime, _) in rows]}
+
+
+async def run_concurrently(count, concurrency, make_call):
+    """Lanza `count` llamadas con concurrencia acotada y devuelve sus latencias."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await make_call(i)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(i) for i in range(count)])
+    return latencies
+
+
+# 🚀 Escenarios
+PARAPHRASES = ("Analiza acciones de Apple + noticias recientes", "analiza las acciones de Apple y sus noticias recientes",
+               "Analiza acciones de Tesla + noticias recientes", "Analiza acciones de Tesla y noticias recientes!")
+
+
+async def bench_orchestrate(mode, args, repeat=False):
+    """Con `repeat`, las consultas son paráfrasis de unas pocas preguntas (caché semántica)."""
+    from financial_agent import orchestrator
+    from financial_agent.tool_cache import tool_cache
+
+    tool_cache.clear()
+    orchestrator.response_cache.clear()
+    ttft = []
+
+    async def call(i):
+        started = time.perf_counter()
+        first = []
+
+        def on_content(text):
+            if not first:
+                first.append(time.perf_counter() - started)
+
+        if repeat:
+            query = PARAPHRASES[i % len(PARAPHRASES)]
+        else:
+            query = f"Compara Tesla vs Ford #{i}" if mode == "fanout" else f"Analiza acciones de Apple #{i}"
+        await orchestrator.orchestrate(query, mode, on_content=on_content)
+        ttft.extend(first)
+
+    started = time.perf_counter()
+    orchestrator.registry.warm("branch" if mode == "fanout" else mode)
+    warm_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await run_concurrently(args.queries, args.concurrency, call)
+    wall = time.perf_counter() - started
+    return {"queries": args.queries, "concurrency": args.concurrency, "warm_s": round(warm_s, 4),
+            "wall_s": round(wall, 4), "throughput_qps": round(args.queries / wall, 3),
+            "latency": latency_summary(latencies), "ttft": latency_summary(ttft),
+            "tool_cache": dict(tool_cache.stats), "registry": orchestrator.registry.stats(),
+            "semantic_cache": orchestrator.response_cache.snapshot()}
+
+
+async def bench_screening(size, args):
+    from benchmarks.synthetic import make_zip
+    from hr_agent.agents import analyze_cv
+    from hr_agent.compaction import compact_cvs
+    from hr_agent.extraction import process_zip
+    from hr_agent.retrieval import shortlist
+    from hr_agent.scoring import score_batch
+
+    archive = make_zip(size)
+    started = time.perf_counter()
+    cvs_data, names = await asyncio.to_thread(process_zip, archive, args.pdf_workers, None, None, False)
+    extract_s = time.perf_counter() - started
+
+    role = "Desarrollador Backend. Skills: Python, SQL. Exp: 3años"
+    started = time.perf_counter()
+    extracted = len(cvs_data)
+    cvs_data, names, _ = shortlist(cvs_data, names, role, args.top_k)
+    shortlist_s = time.perf_counter() - started
+    cvs_data, reports = compact_cvs(cvs_data)
+
+    shard_latencies = []
+
+    async def score_fn(content, on_content=None):
+        shard_started = time.perf_counter()
+        try:
+            return await analyze_cv(content, role, "batch", on_content)
+        finally:
+            shard_latencies.append(time.perf_counter() - shard_started)
+
+    started = time.perf_counter()
+    df, unscored, _ = await score_batch(cvs_data, names, score_fn, concurrency=args.concurrency)
+    score_s = time.perf_counter() - started
+    total = extract_s + shortlist_s + score_s
+    return {"cvs": size, "extracted": extracted, "shortlisted": len(names), "scored": len(df), "unscored": len(unscored),
+            "extract_s": round(extract_s, 4), "shortlist_s": round(shortlist_s, 4), "score_s": round(score_s, 4),
+            "wall_s": round(total, 4),
+            "throughput_cvs_per_s": round(size / total, 3), "extract_cvs_per_s": round(size / extract_s, 3),
+            "tokens_saved": sum(r.tokens_saved for r in reports),
+            "shard_latency": latency_summary(shard_latencies)}
+
+
+async def bench_maps(args):
+    from mcp import StdioServerParameters
+
+    from maps_agent.service import MapsService
+
+    server = StdioServerParameters(command=sys.executable, args=[str(ROOT / "benchmarks" / "stub_mcp_server.py")],
+                                   env={**os.environ, "STUB_MCP_LATENCY": str(args.tool_latency)})
+    started = time.perf_counter()
+    async with MapsService(server, concurrency=args.concurrency) as service:
+        cold_start_s = time.perf_counter() - started
+        started = time.perf_counter()
+        latencies = await run_concurrently(
+            args.queries, args.concurrency, lambda i: service.ask(f"Restaurantes cerca de la oficina {i}"))
+        wall = time.perf_counter() - started
+    return {"queries": args.queries, "concurrency": args.concurrency, "cold_start_s": round(cold_start_s, 4),
+            "wall_s": round(wall, 4), "throughput_qps": round(args.queries / wall, 3),
+            "latency": latency_summary(latencies)}
+
+
+async def bench_maps_batch(args):
+    """Fichero de consultas con oficinas repetidas: mide consultas/s, caché MCP y reanudación."""
+    from mcp import StdioServerParameters
+
+    from maps_agent.batch import read_queries, run_batch
+    from maps_agent.service import MapsService
+
+    workdir = Path(tempfile.mkdtemp(prefix="agno-bench-maps-"))
+    source, out = workdir / "queries.csv", workdir / "results.jsonl"
+    source.write_text("direccion\n" + "".join(f"Oficina {i % 5}\n" for i in range(args.queries)))
+    server = StdioServerParameters(command=sys.executable, args=[str(ROOT / "benchmarks" / "stub_mcp_server.py")],
+                                   env={**os.environ, "STUB_MCP_LATENCY": str(args.tool_latency)})
+    async with MapsService(server, concurrency=args.concurrency) as service:
+        first = await run_batch(service, read_queries(source, "Restaurantes cerca de {direccion}"), out,
+                                args.concurrency)
+        resumed = await run_batch(service, read_queries(source, "Restaurantes cerca de {direccion}"), out,
+                                  args.concurrency)
+    return {"queries": args.queries, "concurrency": args.concurrency, "wall_s": first["wall_s"],
+            "throughput_qps": first["queries_per_s"], "answered": first["answered"], "errors": first["errors"],
+            "resumed_skipped": resumed["skipped"], "tool_cache": first["tool_cache"]}
+
+
+def measure(name, args, coroutine_factory):
+    from common.telemetry import exporter, load_spans, summarize
+
+    exporter.recent.clear()
+    with RssSampler() as rss, Profiler(args.profile) as profiler:
+        result = asyncio.run(coroutine_factory())
+    result.update({"scenario": name, "peak_rss_mb": round(rss.peak, 1), "spans": summarize(load_spans())})
+    if profiler.report:
+        result["profile"] = profiler.report
+    print(f"✔️  {name}: {json.dumps({k: v for k, v in result.items() if k not in ('profile', 'spans')}, ensure_ascii=False)}")
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline de la suite de agentes")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Lista separada por comas: {', '.join(SCENARIOS)}")
+    parser.add_argument("--sizes", default="10,100,1000", help="Tamaños de ZIP sintético para screening")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Latencia por respuesta del modelo falso (s)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Latencia entre fragmentos del stream (s)")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Latencia de herramientas stub (s)")
+    parser.add_argument("--pdf-workers", type=int, default=None)
+    parser.add_argument("--top-k", type=int, default=50, help="CVs preseleccionados por screening (0 = todos)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="El modelo falso responde 429 por encima de esta concurrencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones con 429 aleatorio")
+    parser.add_argument("--rate-limits", default="gpt-4o=10000/10000000,gpt-4o-mini=10000/10000000",
+                        help="Límites del planificador (modelo=rpm/tpm); por defecto holgados para medir overhead")
+    parser.add_argument("--profile", choices=("cprofile", "pyinstrument", "none"), default="cprofile")
+    parser.add_argument("--out", default="bench_output.json")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("TELEMETRY_FILE", str(Path(tempfile.mkdtemp(prefix="agno-bench-spans-")) / "spans.jsonl"))
+    from benchmarks import stubs
+    from benchmarks.fake_openai import FakeOpenAI
+    from common.ratelimit import parse_limits, scheduler
+
+    scheduler.limits = parse_limits(args.rate_limits)
+    stubs.TOOL_LATENCY = args.tool_latency
+    os.environ.setdefault("HR_CACHE_DIR", tempfile.mkdtemp(prefix="agno-bench-cache-"))
+
+    results = []
+    with FakeOpenAI(latency=args.model_latency, token_latency=args.token_latency,
+                    max_concurrent=args.max_concurrent, error_rate=args.error_rate) as fake:
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+        os.environ["OPENAI_API_KEY"] = "bench"
+        stubs.install()
+
+        for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if scenario == "orchestrate_repeat":
+                results.append(measure(scenario, args, lambda: bench_orchestrate("team", args, repeat=True)))
+            elif scenario.startswith("orchestrate_"):
+                mode = scenario.split("_", 1)[1]
+                results.append(measure(scenario, args, lambda: bench_orchestrate(mode, args)))
+            elif scenario == "screening":
+                for size in [int(s) for s in args.sizes.split(",")]:
+                    results.append(measure(f"screening_{size}", args, lambda: bench_screening(size, args)))
+            elif scenario == "maps":
+                results.append(measure("maps", args, lambda: bench_maps(args)))
+            elif scenario == "maps_batch":
+                results.append(measure("maps_batch", args, lambda: bench_maps_batch(args)))
+            else:
+                parser.error(f"Escenario desconocido: {scenario}")
+        model_requests = fake.requests
+        rate_limited = fake.rejected
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "model_requests": model_requests,
+        "rate_limited": rate_limited,
+        "scheduler": scheduler.stats(),
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"📄 Resultados en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Servidor MCP stdio stub con herramientas tipo Google Maps y latencia determinista.
+
+Uso: python benchmarks/stub_mcp_server.py   (STUB_MCP_LATENCY=segundos)
+"""
+import asyncio
+import json
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+LATENCY = float(os.getenv("STUB_MCP_LATENCY", 0.02))
+
+mcp = FastMCP("stub-google-maps", log_level="WARNING")
+
+
+@mcp.tool()
+async def maps_geocode(address: str) -> str:
+    """Convierte una dirección en coordenadas."""
+    await asyncio.sleep(LATENCY)
+    return json.dumps({"address": address, "location": {"lat": 4.8133, "lng": -75.6961}})
+
+
+@mcp.tool()
+async def maps_search_places(query: str) -> str:
+    """Busca lugares por texto."""
+    await asyncio.sleep(LATENCY)
+    return json.dumps({"places": [{"name": f"{query} #{i}", "rating": 4.5 - i / 10} for i in range(5)]})
+
+
+@mcp.tool()
+async def maps_directions(origin: str, destination: str) -> str:
+    """Ruta entre dos puntos."""
+    await asyncio.sleep(LATENCY)
+    return json.dumps({"origin": origin, "destination": destination, "distance_km": 12.3, "duration_min": 25})
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,81 @@
+"""Toolkits stub con los mismos nombres de función que los reales y latencia configurable."""
+import time
+
+from agno.tools import Toolkit
+
+TOOL_LATENCY = 0.02
+
+
+def _wait():
+    time.sleep(TOOL_LATENCY)
+
+
+class StubDuckDuckGoTools(Toolkit):
+    def __init__(self, **kwargs):
+        super().__init__(name="duckduckgo", tools=[self.duckduckgo_search, self.duckduckgo_news])
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Busca en la web.
+
+        Args:
+            query (str): Consulta.
+            max_results (int): Número de resultados.
+        """
+        _wait()
+        return f'[{{"title": "Resultado para {query}", "href": "https://example.com/1"}}]'
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Busca noticias.
+
+        Args:
+            query (str): Consulta.
+            max_results (int): Número de resultados.
+        """
+        _wait()
+        return f'[{{"title": "Noticia sobre {query}", "url": "https://example.com/n"}}]'
+
+
+class StubNewspaper4kTools(Toolkit):
+    def __init__(self, **kwargs):
+        super().__init__(name="newspaper4k_tools", tools=[self.read_article])
+
+    def read_article(self, url: str) -> str:
+        """Lee un artículo.
+
+        Args:
+            url (str): URL del artículo.
+        """
+        _wait()
+        return f'{{"title": "Artículo", "url": "{url}", "text": "{"contenido " * 200}"}}'
+
+
+class StubYFinanceTools(Toolkit):
+    def __init__(self, **kwargs):
+        super().__init__(name="yfinance_tools", tools=[self.get_current_stock_price, self.get_company_info])
+
+    def get_current_stock_price(self, symbol: str) -> str:
+        """Precio actual de una acción.
+
+        Args:
+            symbol (str): Ticker.
+        """
+        _wait()
+        return f"{symbol}: 187.42"
+
+    def get_company_info(self, symbol: str) -> str:
+        """Información de la compañía.
+
+        Args:
+            symbol (str): Ticker.
+        """
+        _wait()
+        return f'{{"symbol": "{symbol}", "sector": "Technology", "marketCap": 2900000000000}}'
+
+
+def install():
+    """Sustituye los toolkits reales del orquestador financiero por los stubs."""
+    from financial_agent import orchestrator
+
+    orchestrator.DuckDuckGoTools = StubDuckDuckGoTools
+    orchestrator.Newspaper4kTools = StubNewspaper4kTools
+    orchestrator.YFinanceTools = StubYFinanceTools
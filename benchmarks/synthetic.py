@@ -0,0 +1,65 @@
+"""Generación de CVs sintéticos en PDF (sin dependencias) y ZIPs en memoria."""
+import io
+import random
+import zipfile
+
+SKILLS = ["Python", "SQL", "Django", "FastAPI", "AWS", "Docker", "Kubernetes", "React",
+          "Pandas", "Spark", "Airflow", "Terraform", "Java", "Go", "Power BI", "Excel"]
+ROLES = ["Desarrollador Backend", "Ingeniero de Datos", "Analista BI", "DevOps", "Desarrollador Full Stack"]
+SCHOOLS = ["Universidad Nacional", "Universidad de los Andes", "Universidad Tecnológica de Pereira", "EAFIT"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(lines):
+    """PDF mínimo de una página con una línea de texto Helvetica por elemento."""
+    body = ["BT /F1 10 Tf 50 780 Td 12 TL"] + [f"({_escape(line)}) '" for line in lines] + ["ET"]
+    stream = "\n".join(body).encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_cv(index, seed=0):
+    rng = random.Random(seed * 100003 + index)
+    years = rng.randint(0, 15)
+    skills = rng.sample(SKILLS, 6)
+    lines = [f"Candidato {index:04d}", f"{rng.choice(ROLES)} - Pereira, Colombia",
+             "correo@ejemplo.com | +57 300 000 0000", "", "PERFIL",
+             f"Profesional con {years} años de experiencia en desarrollo de software y datos.", "",
+             "EXPERIENCIA"]
+    for job in range(3):
+        lines += [f"Empresa {rng.randint(1, 500)} - {rng.choice(ROLES)} ({2024 - job * 3 - 3}-{2024 - job * 3})",
+                  f"- Lideré proyectos con {', '.join(rng.sample(skills, 3))}.",
+                  "- Mejoré tiempos de respuesta y automaticé procesos internos."]
+    lines += ["", "HABILIDADES", ", ".join(skills), "", "EDUCACIÓN",
+              f"Ingeniería de Sistemas - {rng.choice(SCHOOLS)}"]
+    return make_pdf(lines)
+
+
+def make_zip(count, seed=0):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(count):
+            archive.writestr(f"cvs/cv_{index:04d}.pdf", make_cv(index, seed))
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1 @@
+"""Utilidades compartidas por los agentes de la suite."""
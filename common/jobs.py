@@ -0,0 +1,378 @@
+"""Cola de trabajos en segundo plano con estado persistente en SQLite.
+
+Los trabajos se ejecutan en un event loop propio (hilo daemon) que vive tanto
+como el proceso, así que un rerun de Streamlit no los interrumpe: la sesión
+guarda el ID y consulta el progreso. Las entradas idénticas se deduplican por
+hash y el reparto entre dueños (reclutadores, sesiones) es round-robin con un
+tope de trabajos simultáneos por dueño.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import queue as thread_queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+from common.telemetry import span
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+JOBS_DIR = Path(os.getenv("JOBS_DIR", Path.home() / ".cache" / "agno-jobs"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", 4))
+JOBS_PER_OWNER = int(os.getenv("JOBS_PER_OWNER", 2))
+JOBS_RETENTION = 7 * 24 * 3600
+PROGRESS_INTERVAL = 0.5  # segundos mínimos entre escrituras de progreso
+
+ACTIVE = ("queued", "running")
+HOST = socket.gethostname()
+
+
+def _alive(pid):
+    """La señal 0 no envía nada: solo comprueba que el proceso existe."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # existe, pero es de otro usuario
+    return True
+
+
+def input_hash(kind, payload):
+    """Hash estable de la entrada; los binarios (ZIPs, PDFs) se resumen por su SHA-256."""
+    def default(value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(value).hexdigest()
+        return repr(value)
+    data = json.dumps(payload, sort_keys=True, default=default, ensure_ascii=False)
+    return hashlib.sha256(f"{kind}:{data}".encode("utf-8")).hexdigest()
+
+
+class JobContext:
+    """Lo que recibe cada handler para reportar progreso y resultados parciales."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+        self._last = 0.0
+
+    def emit(self, *event):
+        """Evento en vivo (sin pasar por SQLite) para las sesiones que siguen el trabajo con `follow`."""
+        self.queue._emit(self.job_id, event)
+
+    def progress(self, done=None, total=None, message=None, partial=None, force=False):
+        now = time.monotonic()
+        finished = total and done is not None and done >= total
+        if not (force or finished) and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        fields = {}
+        if total:
+            fields["progress"] = min(1.0, (done or 0) / total)
+        if message is not None:
+            fields["message"] = message
+        if partial is not None:
+            fields["partial"] = json.dumps(partial, ensure_ascii=False, default=str)
+        if fields:
+            self.queue._update(self.job_id, **fields)
+
+
+class JobQueue:
+    """Pool de workers async sobre un event loop de larga vida, con estado en SQLite."""
+
+    def __init__(self, path, workers=None, per_owner=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or JOBS_WORKERS
+        self.per_owner = per_owner or JOBS_PER_OWNER
+        self._handlers = {}  # kind -> (handler, dedupe_ttl, reusable)
+        self._payloads = {}  # los payloads solo viven en memoria (pueden ser binarios grandes)
+        self._pending = defaultdict(deque)  # dueño -> IDs en cola
+        self._owners = deque()
+        self._running = Counter()
+        self._tasks = {}
+        self._listeners = defaultdict(list)  # ID -> colas de las sesiones que lo siguen
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                partial TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                host TEXT,
+                pid INTEGER,
+                reusable INTEGER NOT NULL DEFAULT 1
+            )""")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("host", "TEXT"), ("pid", "INTEGER"), ("reusable", "INTEGER NOT NULL DEFAULT 1")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_hash ON jobs(input_hash, status)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs(owner, created_at)")
+        now = time.time()
+        self._fail_orphans(now)
+        self._db.execute("DELETE FROM jobs WHERE finished_at < ?", (now - JOBS_RETENTION,))
+
+    def _fail_orphans(self, now):
+        """Marca como fallidos los trabajos activos de procesos muertos de esta máquina.
+
+        Su payload vivía en memoria, así que no pueden reanudarse. Los de otros
+        procesos vivos (la otra app sobre la misma base) no se tocan.
+        """
+        rows = self._db.execute("SELECT id, pid FROM jobs WHERE status IN ('queued', 'running') "
+                                "AND (host = ? OR host IS NULL)", (HOST,)).fetchall()
+        orphans = [(now, job_id) for job_id, pid in rows if pid is None or not _alive(pid)]
+        self._db.executemany("UPDATE jobs SET status = 'failed', error = 'Interrumpido por reinicio', "
+                             "finished_at = ? WHERE id = ?", orphans)
+
+    def register(self, kind, dedupe_ttl=None, reusable=None):
+        """Decorador: `async def handler(ctx, **payload)` devuelve un resultado serializable a JSON.
+
+        `dedupe_ttl` limita cuánto tiempo se reutiliza un resultado terminado
+        para la misma entrada (None = mientras se conserve). `reusable(result)`
+        decide si un resultado sirve para deduplicar (p. ej. no si quedó incompleto).
+        """
+        def decorator(handler):
+            self._handlers[kind] = (handler, dedupe_ttl, reusable)
+            return handler
+        return decorator
+
+    # 🚀 Event loop y workers
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._wake = asyncio.Event()
+            for _ in range(self.workers):
+                self._loop.create_task(self._worker())
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="job-queue", daemon=True).start()
+        ready.wait()
+
+    def _notify(self):
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _take(self):
+        """Siguiente trabajo en round-robin entre dueños, respetando el tope por dueño."""
+        with self._lock:
+            for _ in range(len(self._owners)):
+                owner = self._owners[0]
+                self._owners.rotate(-1)
+                if self._pending[owner] and self._running[owner] < self.per_owner:
+                    self._running[owner] += 1
+                    return owner, self._pending[owner].popleft()
+        return None
+
+    async def _worker(self):
+        while True:
+            taken = self._take()
+            if taken is None:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            owner, job_id = taken
+            # Cada trabajo en su propia tarea: cancelarlo no detiene al worker
+            task = self._tasks[job_id] = asyncio.create_task(self._execute(job_id))
+            try:
+                await asyncio.wait([task])
+            finally:
+                self._tasks.pop(job_id, None)
+                with self._lock:
+                    self._running[owner] -= 1
+                self._wake.set()
+
+    async def _execute(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT kind, status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        payload = self._payloads.pop(job_id, None)
+        if row is None or row[1] != "queued" or payload is None:
+            return
+        handler, _, reusable = self._handlers[row[0]]
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            with span(f"job:{row[0]}", "job", job_id=job_id):
+                result = await handler(JobContext(self, job_id), **payload)
+        except asyncio.CancelledError:
+            self._update(job_id, status="cancelled", finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e) or type(e).__name__, finished_at=time.time())
+        else:
+            self._update(job_id, status="done", progress=1.0, finished_at=time.time(),
+                         result=json.dumps(result, ensure_ascii=False, default=str),
+                         reusable=int(reusable is None or bool(reusable(result))))
+        finally:
+            self._emit(job_id, None)
+
+    def _emit(self, job_id, event):
+        with self._lock:
+            listeners = list(self._listeners.get(job_id, ()))
+        for listener in listeners:
+            listener.put(event)
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    # 📥 API para las sesiones
+    def submit(self, kind, payload, owner="anon"):
+        """Encola un trabajo y devuelve su ID; una entrada idéntica reutiliza el trabajo existente."""
+        if kind not in self._handlers:
+            raise KeyError(f"Tipo de trabajo no registrado: {kind}")
+        digest = input_hash(kind, payload)
+        _, dedupe_ttl, _ = self._handlers[kind]
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE input_hash = ? AND (status IN ('queued', 'running') "
+                "OR (status = 'done' AND reusable = 1 AND finished_at >= ?)) ORDER BY created_at DESC LIMIT 1",
+                (digest, now - dedupe_ttl if dedupe_ttl else 0)).fetchone()
+            if row:
+                return row[0]
+            job_id = uuid.uuid4().hex[:12]
+            self._db.execute("INSERT INTO jobs (id, kind, owner, input_hash, status, created_at, host, pid) "
+                             "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                             (job_id, kind, owner, digest, now, HOST, os.getpid()))
+            self._payloads[job_id] = payload
+            self._pending[owner].append(job_id)
+            if owner not in self._owners:
+                self._owners.append(owner)
+        self.start()
+        self._notify()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            cursor = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        job = dict(zip([c[0] for c in cursor.description], row))
+        for field in ("partial", "result"):
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def follow(self, job_id, check_interval=1.0):
+        """Eventos en vivo de un trabajo de este proceso, hasta que termina (generador bloqueante).
+
+        Los eventos emitidos antes de suscribirse se pierden: se empieza por
+        el `partial` guardado y se sigue desde ahí.
+        """
+        events = thread_queue.SimpleQueue()
+        with self._lock:
+            self._listeners[job_id].append(events)
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=check_interval)
+                except thread_queue.Empty:
+                    job = self.get(job_id)
+                    if job is None or job["status"] not in ACTIVE:
+                        return
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            with self._lock:
+                self._listeners[job_id].remove(events)
+                if not self._listeners[job_id]:
+                    del self._listeners[job_id]
+
+    def run_interactive(self, fn, *args, **callbacks):
+        """Ejecuta `fn(*args, **callbacks)` en el loop de larga vida y espera su resultado en este hilo.
+
+        Para las llamadas directas de la UI: con `asyncio.run` cada clic crearía
+        un loop nuevo (y con él un cliente HTTP sin reutilizar ni cerrar). Los
+        callbacks (p. ej. de StreamlitRenderer) se ejecutan en el hilo que llama,
+        y el contexto (carril del planificador, span actual) viaja con la llamada.
+        """
+        self.start()
+        events = thread_queue.SimpleQueue()
+        proxies = {name: (lambda *a, _name=name: events.put((_name, a))) if callable(callback) else callback
+                   for name, callback in callbacks.items()}
+        context = contextvars.copy_context()
+        scheduled = {}
+
+        def schedule():
+            task = scheduled["task"] = self._loop.create_task(fn(*args, **proxies), context=context)
+            task.add_done_callback(lambda _: events.put(None))
+
+        self._loop.call_soon_threadsafe(schedule)
+        try:
+            while (event := events.get()) is not None:
+                name, event_args = event
+                callbacks[name](*event_args)
+        except BaseException:
+            # El script se interrumpió (rerun, stop): la llamada no debe seguir sola en el loop
+            self._loop.call_soon_threadsafe(lambda: scheduled["task"].cancel())
+            raise
+        return scheduled["task"].result()
+
+    def list(self, owner=None, limit=20):
+        query, params = "SELECT id FROM jobs", ()
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", (owner,)
+        with self._lock:
+            ids = [r[0] for r in self._db.execute(f"{query} ORDER BY created_at DESC LIMIT ?", (*params, limit))]
+        return [self.get(job_id) for job_id in ids]
+
+    def cancel(self, job_id):
+        with self._lock:
+            for pending in self._pending.values():
+                if job_id in pending:
+                    pending.remove(job_id)
+                    self._payloads.pop(job_id, None)
+                    self._db.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                                     (time.time(), job_id))
+                    return True
+        task = self._tasks.get(job_id)
+        if task is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+            return True
+        return False
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            return {"by_status": counts, "queued_owners": sum(1 for q in self._pending.values() if q),
+                    "running": sum(self._running.values())}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Cola compartida por todo el proceso (sobrevive a los reruns de Streamlit)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(JOBS_DIR / "jobs.sqlite3")
+    return _queue
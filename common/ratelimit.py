@@ -0,0 +1,394 @@
+"""Planificador de llamadas al modelo: token buckets por modelo, concurrencia AIMD y carriles de prioridad.
+
+Todas las llamadas de `PooledOpenAIChat` pasan por aquí (ver common/registry.py).
+Cada modelo tiene un bucket de peticiones/min y otro de tokens/min; la
+concurrencia se ajusta sola (sube +1/límite por éxito, se reduce a la mitad con
+un 429 o ×0.9 si la latencia se dispara) y los reintentos usan backoff
+exponencial con jitter, respetando `Retry-After`. Los carriles ordenan la cola:
+el chat interactivo pasa por delante del screening masivo.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+# OPENAI_RATE_LIMITS="gpt-4o=500/30000,gpt-4o-mini=500/200000" (peticiones/min / tokens/min)
+DEFAULT_LIMITS = {"gpt-4o": (500, 30_000), "gpt-4o-mini": (500, 200_000)}
+FALLBACK_LIMITS = (500, 30_000)
+INITIAL_CONCURRENCY = float(os.getenv("OPENAI_CONCURRENCY", 8))
+MAX_CONCURRENCY = float(os.getenv("OPENAI_MAX_CONCURRENCY", 64))
+MAX_RETRIES = int(os.getenv("OPENAI_RETRIES", 5))
+LATENCY_TARGET = float(os.getenv("OPENAI_LATENCY_TARGET", 60))  # segundos por llamada
+BACKOFF_BASE, BACKOFF_MAX = 0.5, 30.0
+EXPECTED_OUTPUT_TOKENS = 512
+
+LANES = {"interactive": 0, "normal": 1, "bulk": 2}
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_lane = contextvars.ContextVar("lane", default="normal")
+
+
+def parse_limits(spec):
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition("/")
+        limits[model.strip()] = (float(rpm), float(tpm))
+    return limits
+
+
+LIMITS = parse_limits(os.getenv("OPENAI_RATE_LIMITS"))
+
+
+# 🛣️ Carriles de prioridad
+def set_lane(name):
+    """Fija el carril del contexto actual (p. ej. al inicio del script de Streamlit)."""
+    return _lane.set(name)
+
+
+@contextmanager
+def lane(name):
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane():
+    return _lane.get()
+
+
+def estimate_tokens(messages, tools=None, max_tokens=None):
+    """Estimación barata (caracteres/4) para reservar del bucket antes de la llamada."""
+    chars = sum(len(str(getattr(m, "content", "") or "")) for m in messages or [])
+    if tools:
+        chars += len(json.dumps(tools, default=str))
+    return chars // 4 + (max_tokens or EXPECTED_OUTPUT_TOKENS)
+
+
+def backoff(attempt, retry_after=None):
+    """Backoff exponencial con full jitter; `Retry-After` del proveedor manda si es mayor."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class _Waiter:
+    """Espera que sirve tanto a corrutinas (cualquier event loop) como a hilos."""
+
+    def __init__(self, tokens, loop=None):
+        self.tokens = tokens
+        self.epoch = None
+        self.loop = loop
+        self._event = asyncio.Event() if loop else threading.Event()
+
+    def notify(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._event.set)
+        else:
+            self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait_async(self, timeout):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def wait(self, timeout):
+        self._event.wait(timeout)
+
+
+class ModelLimiter:
+    """Límites de un modelo: buckets de peticiones y tokens más una ventana de concurrencia AIMD."""
+
+    def __init__(self, model, rpm, tpm, concurrency=None, max_concurrency=None):
+        self.model = model
+        self.rpm, self.tpm = rpm, tpm
+        self.limit = concurrency or INITIAL_CONCURRENCY
+        self.max_limit = max_concurrency or MAX_CONCURRENCY
+        self.active = 0
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "errors": 0, "waited_s": 0.0}
+        self._requests, self._tokens = float(rpm), float(tpm)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._epoch = 0  # sube con cada reducción: los 429 de peticiones anteriores ya están contados
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._refilled
+        self._refilled = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _grant(self, waiter):
+        """Bajo el lock: 0 si el waiter obtiene turno, segundos a esperar o None (hasta que lo avisen)."""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._heap or self._heap[0][2] is not waiter:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.active >= max(1, int(self.limit)):
+            return None
+        tokens = min(waiter.tokens, self.tpm)
+        if self._requests < 1:
+            return (1 - self._requests) * 60 / self.rpm
+        if self._tokens < tokens:
+            return (tokens - self._tokens) * 60 / self.tpm
+        self._requests -= 1
+        self._tokens -= tokens
+        self.active += 1
+        self.stats["requests"] += 1
+        waiter.epoch = self._epoch
+        heapq.heappop(self._heap)
+        self._notify_head()
+        return 0
+
+    def _notify_head(self):
+        if self._heap:
+            self._heap[0][2].notify()
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            heapq.heappush(self._heap, (LANES.get(current_lane(), 1), next(self._seq), waiter))
+
+    def _abandon(self, waiter):
+        with self._lock:
+            self._heap = [entry for entry in self._heap if entry[2] is not waiter]
+            heapq.heapify(self._heap)
+            self._notify_head()
+
+    async def acquire(self, tokens):
+        """Espera turno; devuelve la época de la ventana, que se pasa luego a `release`."""
+        waiter = _Waiter(tokens, asyncio.get_running_loop())
+        started = time.monotonic()
+        self._enqueue(waiter)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._grant(waiter)
+                    if delay == 0:
+                        break
+                    waiter.clear()
+                await waiter.wait_async(delay)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record_wait(started)
+        return waiter.epoch
+
+    def acquire_sync(self, tokens):
+        waiter = _Waiter(tokens)
+        started = time.monotonic()
+        self._enqueue(waiter)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._grant(waiter)
+                    if delay == 0:
+                        break
+                    waiter.clear()
+                waiter.wait(delay)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record_wait(started)
+        return waiter.epoch
+
+    def _record_wait(self, started):
+        waited = time.monotonic() - started
+        with self._lock:
+            self.stats["waited_s"] += waited
+            if waited > 0.01:
+                self.stats["throttled"] += 1
+
+    def release(self, reserved, used=None, latency=None, status=None, retry_after=None, epoch=None):
+        """Devuelve el turno y ajusta la ventana: AIMD según 429 y latencia.
+
+        Como en TCP, la ventana se reduce una vez por generación de peticiones:
+        los 429 de peticiones lanzadas antes de la última reducción no la repiten.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.active -= 1
+            if used is not None:
+                # Corrige la reserva con el consumo real (puede dejar el bucket en negativo)
+                self._tokens -= used - min(reserved, self.tpm)
+            if status == 429:
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                if epoch is None or epoch == self._epoch:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._epoch += 1
+            elif status is None and latency is not None:
+                if latency > LATENCY_TARGET:
+                    self.limit = max(1.0, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif status is not None:
+                self.stats["errors"] += 1
+            self._notify_head()
+
+    def snapshot(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return {**self.stats, "model": self.model, "concurrency": round(self.limit, 2), "active": self.active,
+                    "queued": len(self._heap), "tokens_available": round(self._tokens),
+                    "waited_s": round(self.stats["waited_s"], 3)}
+
+
+class Scheduler:
+    """Un ModelLimiter por modelo, compartido por todo el proceso."""
+
+    def __init__(self, limits=None):
+        self.limits = limits or LIMITS
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model):
+        with self._lock:
+            if model not in self._limiters:
+                rpm, tpm = self.limits.get(model, FALLBACK_LIMITS)
+                self._limiters[model] = ModelLimiter(model, rpm, tpm)
+            return self._limiters[model]
+
+    def stats(self):
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.model: limiter.snapshot() for limiter in limiters}
+
+
+scheduler = Scheduler()
+
+
+# 🔁 Ejecución con turno, reintentos y contabilidad de tokens
+def _failure(error):
+    """(status HTTP, Retry-After en segundos) de un error del proveedor."""
+    status = getattr(error, "status_code", None)
+    response = getattr(error.__cause__, "response", None) or getattr(error, "response", None)
+    retry_after = None
+    if response is not None:
+        status = status or getattr(response, "status_code", None)
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return status, retry_after
+
+
+def _usage(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage else None
+
+
+def _retryable(status, attempt):
+    """Sin status HTTP (conexión caída, timeout) también se reintenta; release ya no reduce la ventana."""
+    return (status is None or status in RETRYABLE_STATUS) and attempt < MAX_RETRIES
+
+
+async def scheduled(model, reserved, call):
+    """Ejecuta `await call()` con turno del modelo y reintenta 429/5xx con backoff."""
+    limiter = scheduler.limiter(model)
+    for attempt in itertools.count():
+        epoch = await limiter.acquire(reserved)
+        started = time.monotonic()
+        try:
+            response = await call()
+        except Exception as e:
+            status, retry_after = _failure(e)
+            limiter.release(reserved, status=status or 0, retry_after=retry_after, epoch=epoch)
+            if not _retryable(status, attempt):
+                raise
+            limiter.stats["retries"] += 1
+            await asyncio.sleep(backoff(attempt, retry_after))
+            continue
+        except BaseException:
+            limiter.release(reserved)
+            raise
+        limiter.release(reserved, used=_usage(response), latency=time.monotonic() - started)
+        return response
+
+
+def scheduled_sync(model, reserved, call):
+    limiter = scheduler.limiter(model)
+    for attempt in itertools.count():
+        epoch = limiter.acquire_sync(reserved)
+        started = time.monotonic()
+        try:
+            response = call()
+        except Exception as e:
+            status, retry_after = _failure(e)
+            limiter.release(reserved, status=status or 0, retry_after=retry_after, epoch=epoch)
+            if not _retryable(status, attempt):
+                raise
+            limiter.stats["retries"] += 1
+            time.sleep(backoff(attempt, retry_after))
+            continue
+        except BaseException:
+            limiter.release(reserved)
+            raise
+        limiter.release(reserved, used=_usage(response), latency=time.monotonic() - started)
+        return response
+
+
+async def scheduled_stream(model, reserved, make_stream):
+    """Como `scheduled` para streams; solo se reintenta si el error llega antes del primer fragmento."""
+    limiter = scheduler.limiter(model)
+    for attempt in itertools.count():
+        epoch = await limiter.acquire(reserved)
+        started, used, received, released = time.monotonic(), None, False, False
+        try:
+            async for chunk in make_stream():
+                received = True
+                used = _usage(chunk) or used
+                yield chunk
+        except Exception as e:
+            status, retry_after = _failure(e)
+            limiter.release(reserved, status=status or 0, retry_after=retry_after, epoch=epoch)
+            released = True
+            if received or not _retryable(status, attempt):
+                raise
+            limiter.stats["retries"] += 1
+            await asyncio.sleep(backoff(attempt, retry_after))
+            continue
+        finally:
+            if not released:
+                limiter.release(reserved, used=used, latency=time.monotonic() - started)
+        return
+
+
+def scheduled_stream_sync(model, reserved, make_stream):
+    limiter = scheduler.limiter(model)
+    for attempt in itertools.count():
+        epoch = limiter.acquire_sync(reserved)
+        started, used, received, released = time.monotonic(), None, False, False
+        try:
+            for chunk in make_stream():
+                received = True
+                used = _usage(chunk) or used
+                yield chunk
+        except Exception as e:
+            status, retry_after = _failure(e)
+            limiter.release(reserved, status=status or 0, retry_after=retry_after, epoch=epoch)
+            released = True
+            if received or not _retryable(status, attempt):
+                raise
+            limiter.stats["retries"] += 1
+            time.sleep(backoff(attempt, retry_after))
+            continue
+        finally:
+            if not released:
+                limiter.release(reserved, used=used, latency=time.monotonic() - started)
+        return
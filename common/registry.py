@@ -0,0 +1,178 @@
+"""Registro de agentes y equipos reutilizables, con clientes HTTP compartidos."""
+import asyncio
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+
+import httpx
+from agno.models.openai import OpenAIChat
+from openai import AsyncOpenAI, OpenAI
+
+from common.ratelimit import (current_lane, estimate_tokens, scheduled, scheduled_stream, scheduled_stream_sync,
+                              scheduled_sync)
+from common.telemetry import instrument, span, start_span, traced_stream, traced_stream_sync
+
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_http_lock = threading.Lock()
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def shared_http_client():
+    """Cliente HTTP síncrono único para todo el proceso (httpx.Client es thread-safe)."""
+    global _sync_client
+    with _http_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(limits=HTTP_LIMITS)
+    return _sync_client
+
+
+def shared_async_http_client():
+    """Cliente HTTP async por event loop: las conexiones de httpx no pueden cruzar loops.
+
+    Las apps llaman al modelo desde el loop de larga vida de la cola de trabajos
+    (`JobQueue.run_interactive`), así que en la práctica hay un solo cliente por
+    proceso; un `asyncio.run` suelto crea el suyo y lo pierde con su loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _http_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = httpx.AsyncClient(limits=HTTP_LIMITS)
+    return client
+
+
+@dataclass
+class PooledOpenAIChat(OpenAIChat):
+    """OpenAIChat que reutiliza el pool de conexiones compartido en lugar de crear uno por llamada.
+
+    Cada llamada pasa además por el planificador de common/ratelimit.py
+    (límites por modelo, concurrencia adaptativa y reintentos ante 429) y
+    deja un span "model" con duración y tokens (common/telemetry.py).
+    """
+
+    def get_client(self) -> OpenAI:
+        return OpenAI(**self._get_client_params(), http_client=shared_http_client())
+
+    def get_async_client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(**self._get_client_params(), http_client=shared_async_http_client())
+
+    def _reserve(self, messages, tools):
+        return estimate_tokens(messages, tools, self.max_completion_tokens or self.max_tokens)
+
+    def _span(self):
+        return dict(name=self.id, kind="model", model=self.id, lane=current_lane())
+
+    def invoke(self, messages, response_format=None, tools=None, tool_choice=None):
+        call = partial(OpenAIChat.invoke, self, messages, response_format, tools, tool_choice)
+        with span(**self._span()) as current:
+            response = scheduled_sync(self.id, self._reserve(messages, tools), call)
+            current.record_usage(response)
+        return response
+
+    async def ainvoke(self, messages, response_format=None, tools=None, tool_choice=None):
+        call = partial(OpenAIChat.ainvoke, self, messages, response_format, tools, tool_choice)
+        with span(**self._span()) as current:
+            response = await scheduled(self.id, self._reserve(messages, tools), call)
+            current.record_usage(response)
+        return response
+
+    def invoke_stream(self, messages, response_format=None, tools=None, tool_choice=None):
+        stream = partial(OpenAIChat.invoke_stream, self, messages, response_format, tools, tool_choice)
+        return traced_stream_sync(start_span(**self._span(), stream=True),
+                                  scheduled_stream_sync(self.id, self._reserve(messages, tools), stream))
+
+    def ainvoke_stream(self, messages, response_format=None, tools=None, tool_choice=None):
+        stream = partial(OpenAIChat.ainvoke_stream, self, messages, response_format, tools, tool_choice)
+        return traced_stream(start_span(**self._span(), stream=True),
+                             scheduled_stream(self.id, self._reserve(messages, tools), stream))
+
+
+def chat_model(model_id, **kwargs):
+    # Los reintentos los gestiona el planificador; los del cliente de OpenAI ocultarían los 429
+    kwargs.setdefault("max_retries", 0)
+    return PooledOpenAIChat(id=model_id, **kwargs)
+
+
+def _reset(instance):
+    """Limpia el estado de sesión/memoria que un Agent o Team acumula entre ejecuciones."""
+    instance.session_id = None
+    instance.memory = None
+    if hasattr(instance, "reset_session"):
+        instance.reset_session()
+    for member in getattr(instance, "members", None) or []:
+        _reset(member)
+
+
+class AgentRegistry:
+    """Pool de agentes/equipos pre-construidos, indexados por nombre y configuración.
+
+    Cada `lease` entrega una instancia en uso exclusivo (Agno guarda estado de
+    la ejecución en el objeto), así que es seguro desde sesiones concurrentes
+    de Streamlit; al devolverla se reinicia su sesión y vuelve al pool.
+    """
+
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._factories = {}
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.built = defaultdict(int)
+        self.reused = defaultdict(int)
+
+    def register(self, name):
+        """Decorador que asocia una fábrica `factory(**config)` a un nombre."""
+        def decorator(factory):
+            self._factories[name] = factory
+            return factory
+        return decorator
+
+    def _key(self, name, config):
+        return (name, tuple(sorted(config.items())))
+
+    def _build(self, name, config):
+        # Cada herramienta del agente (y de los miembros de un Team) deja su span
+        return instrument(self._factories[name](**config))
+
+    def _acquire(self, name, config):
+        key = self._key(name, config)
+        with self._lock:
+            if self._idle[key]:
+                self.reused[key] += 1
+                return key, self._idle[key].pop()
+            self.built[key] += 1
+        return key, self._build(name, config)
+
+    def _release(self, key, instance):
+        _reset(instance)
+        with self._lock:
+            if len(self._idle[key]) < self.max_idle:
+                self._idle[key].append(instance)
+
+    @contextmanager
+    def lease(self, name, **config):
+        key, instance = self._acquire(name, config)
+        try:
+            with span(name, "agent", **config):
+                yield instance
+        finally:
+            self._release(key, instance)
+
+    def warm(self, name, count=1, **config):
+        """Pre-construye instancias para que la primera consulta no pague el arranque."""
+        key = self._key(name, config)
+        with self._lock:
+            missing = max(0, min(count, self.max_idle) - len(self._idle[key]))
+        instances = [self._build(name, config) for _ in range(missing)]
+        with self._lock:
+            self.built[key] += len(instances)
+            self._idle[key].extend(instances)
+
+    def stats(self):
+        with self._lock:
+            return {"built": sum(self.built.values()), "reused": sum(self.reused.values()),
+                    "idle": sum(len(v) for v in self._idle.values())}
@@ -0,0 +1,136 @@
+"""Consumo incremental de los eventos de ejecución de Agno y renderizado en Streamlit."""
+import json
+import time
+
+
+def _event(event):
+    return getattr(event, "event", "") or ""
+
+
+async def stream_run(runner, message, on_content=None, on_tool=None, **kwargs):
+    """Ejecuta un Agent/Team en modo stream y devuelve el texto completo.
+
+    `on_content(texto_acumulado)` se llama con cada fragmento de la respuesta
+    final; `on_tool(fase, tool)` con cada inicio/fin de llamada a herramienta,
+    incluidas las de los miembros de un Team.
+    """
+    # Un Team reenvía también el contenido de sus miembros: solo cuenta el suyo
+    content_event = "TeamRunResponseContent" if hasattr(runner, "members") else "RunResponseContent"
+    text = ""
+    async for event in await runner.arun(message, stream=True, stream_intermediate_steps=True, **kwargs):
+        name = _event(event)
+        if name == content_event and isinstance(event.content, str):
+            text += event.content
+            if on_content:
+                on_content(text)
+        elif name.endswith("ToolCallStarted") and on_tool:
+            on_tool("started", event.tool)
+        elif name.endswith("ToolCallCompleted") and on_tool:
+            on_tool("completed", event.tool)
+        elif name.endswith("RunError"):
+            raise RuntimeError(event.content or "Error en la ejecución del agente")
+    return text
+
+
+class StreamlitRenderer:
+    """Escribe la respuesta en un `st.empty()` a medida que llega y muestra el progreso de herramientas."""
+
+    def __init__(self, label="🤖 Trabajando...", render="markdown", min_interval=0.05):
+        import streamlit as st
+
+        self.status = st.status(label, expanded=False)
+        self.placeholder = st.empty()
+        self.render = render
+        self.min_interval = min_interval
+        self.tools = 0
+        self._last = 0.0
+
+    def _show(self, text):
+        if self.render == "markdown":
+            self.placeholder.markdown(text)
+        else:
+            self.placeholder.text(text)
+
+    def on_content(self, text):
+        now = time.monotonic()
+        if now - self._last >= self.min_interval:
+            self._last = now
+            self._show(text + " ▌")
+
+    def on_tool(self, phase, tool):
+        name = getattr(tool, "tool_name", None) or "herramienta"
+        if phase == "started":
+            self.tools += 1
+            args = json.dumps(getattr(tool, "tool_args", None) or {}, ensure_ascii=False)[:120]
+            self.status.update(label=f"🛠️ {name}...")
+            self.status.write(f"🛠️ `{name}` {args}")
+        else:
+            self.status.write(f"✔️ `{name}` listo")
+
+    def done(self, text, clear=False):
+        self.status.update(label=f"✅ Completado · {self.tools} herramientas", state="complete")
+        if clear:
+            self.placeholder.empty()
+        else:
+            self._show(text)
+
+    def failed(self):
+        self.status.update(label="❌ Error", state="error")
+
+
+# 📮 Trabajos en segundo plano (common.jobs)
+POLL_INTERVAL = 1.0
+
+
+def session_owner():
+    """Dueño de los trabajos de esta sesión, para el reparto justo de la cola."""
+    import uuid
+
+    import streamlit as st
+
+    return st.session_state.setdefault("job_owner", uuid.uuid4().hex[:8])
+
+
+def show_job(job):
+    """Muestra estado y progreso de un trabajo; devuelve True mientras siga activo."""
+    import streamlit as st
+
+    if job is None:
+        return False
+    if job["status"] == "queued":
+        st.info("⏳ En cola...")
+        return True
+    if job["status"] == "running":
+        st.progress(job["progress"], text=job["message"] or "🤖 Trabajando...")
+        return True
+    if job["status"] == "failed":
+        st.error(f"❌ {job['error']}")
+    elif job["status"] == "cancelled":
+        st.warning("🚫 Cancelado")
+    return False
+
+
+def follow_job(queue, job, renderer):
+    """Renderiza en vivo (tokens y herramientas) un trabajo activo hasta que termina; devuelve su estado final."""
+    if job["partial"]:
+        renderer.on_content(job["partial"])
+    for event in queue.follow(job["id"]):
+        if event[0] == "content":
+            renderer.on_content(event[1])
+        elif event[0] == "tool":
+            renderer.on_tool(*event[1:])
+    job = queue.get(job["id"])
+    if job["status"] == "done":
+        renderer.done(job["result"], clear=True)
+    else:
+        renderer.failed()
+    return job
+
+
+def poll(active, interval=POLL_INTERVAL):
+    """Al final del script: con trabajos activos, espera y relanza el script para refrescar."""
+    import streamlit as st
+
+    if active:
+        time.sleep(interval)
+        st.rerun()
@@ -0,0 +1,329 @@
+"""Trazas de ejecución: spans de agentes, llamadas al modelo y herramientas.
+
+Cada span guarda duración, tokens, aciertos de caché y errores, y se exporta
+como una línea JSON con los campos de OTLP (traceId, spanId, parentSpanId,
+startTimeUnixNano...) en `TELEMETRY_FILE`. El span activo viaja en un
+contextvar, así que las llamadas anidadas (Team → miembro → herramienta →
+modelo) quedan enlazadas sin pasar nada a mano.
+
+    python -m common.telemetry [spans.jsonl]   # p50/p95 por herramienta y modelo
+"""
+import contextvars
+import inspect
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") not in ("0", "false", "no")
+TELEMETRY_FILE = Path(os.getenv("TELEMETRY_FILE", Path.home() / ".cache" / "agno-telemetry" / "spans.jsonl"))
+TELEMETRY_MAX_MB = float(os.getenv("TELEMETRY_MAX_MB", 50))
+RECENT_SPANS = 5000
+
+_current = contextvars.ContextVar("span", default=None)
+_service = "agno"
+
+
+def set_service(name):
+    """Nombre del punto de entrada (`service.name` en OTel) para los spans de este proceso."""
+    global _service
+    _service = name
+
+
+# 🧵 Spans
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name, kind="internal", parent=None, **attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def add(self, name, amount=1):
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def record_usage(self, response):
+        """Tokens de una respuesta (o del último fragmento de un stream) de OpenAI."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.set(input_tokens=getattr(usage, "prompt_tokens", None),
+                 output_tokens=getattr(usage, "completion_tokens", None),
+                 cached_tokens=getattr(details, "cached_tokens", None) or None)
+
+    def end(self, error=None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        exporter.export(self)
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {"traceId": self.trace_id, "spanId": self.span_id, "parentSpanId": self.parent_id,
+                "name": self.name, "kind": self.kind,
+                "startTimeUnixNano": self.start_ns, "endTimeUnixNano": self.end_ns,
+                "attributes": self.attributes,
+                "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+                "resource": {"service.name": _service}}
+
+
+def start_span(name, kind="internal", **attributes):
+    """Span hijo del activo que no se activa (para streams, que no pueden fijar el contextvar)."""
+    return Span(name, kind, _current.get(), **attributes)
+
+
+@contextmanager
+def span(name, kind="internal", **attributes):
+    current = start_span(name, kind, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+async def traced_stream(current, stream):
+    """Cierra `current` al agotarse el stream; anota el primer fragmento y el uso de tokens."""
+    try:
+        async for chunk in stream:
+            _on_chunk(current, chunk)
+            yield chunk
+    except Exception as e:
+        current.end(e)
+        raise
+    finally:
+        current.end()
+
+
+def traced_stream_sync(current, stream):
+    try:
+        for chunk in stream:
+            _on_chunk(current, chunk)
+            yield chunk
+    except Exception as e:
+        current.end(e)
+        raise
+    finally:
+        current.end()
+
+
+def _on_chunk(current, chunk):
+    if "ttft_ms" not in current.attributes:
+        current.set(ttft_ms=round(current.duration_ms, 1))
+    current.record_usage(chunk)
+
+
+def annotate(**attributes):
+    """Añade atributos al span activo, si lo hay."""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def count(name, amount=1):
+    current = _current.get()
+    if current is not None:
+        current.add(name, amount)
+
+
+# 🛠️ Herramientas de Agno
+async def trace_tool(function_name, function_call, arguments):
+    """`tool_hook` de Agno: un span por llamada a herramienta, con su error si falla.
+
+    Las delegaciones de un Team devuelven un generador async (el stream del
+    miembro): su span se cierra al agotarlo, no al devolverlo.
+    """
+    current = start_span(function_name, "tool", tool=function_name)
+    token = _current.set(current)
+    try:
+        result = function_call(**arguments)
+        if inspect.isawaitable(result):
+            result = await result
+    except Exception as e:
+        current.end(e)
+        raise
+    finally:
+        _current.reset(token)
+    if inspect.isasyncgen(result):
+        return traced_stream(current, result)
+    if isinstance(result, str) and result.lstrip().lower().startswith("error"):
+        current.error = result[:200]
+    current.end()
+    return result
+
+
+def instrument(runner):
+    """Engancha `trace_tool` a un Agent/Team y a sus miembros."""
+    runner.tool_hooks = [*(runner.tool_hooks or []), trace_tool]
+    for member in getattr(runner, "members", None) or []:
+        instrument(member)
+    return runner
+
+
+# 📝 Exportación
+class JsonlExporter:
+    """Añade cada span terminado al JSONL y guarda los últimos en memoria para el panel."""
+
+    def __init__(self, path, enabled=True, max_mb=TELEMETRY_MAX_MB):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = max_mb * 1024 * 1024
+        self.recent = deque(maxlen=RECENT_SPANS)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, finished):
+        record = finished.to_dict()
+        with self._lock:
+            self.recent.append(record)
+            if not self.enabled:
+                return
+            try:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = self.path.open("a", encoding="utf-8")
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+                if self._file.tell() > self.max_bytes:
+                    self._rotate()
+            except OSError:
+                self.enabled = False
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.path, self.path.with_suffix(".jsonl.1"))
+        self._file = None
+
+
+exporter = JsonlExporter(TELEMETRY_FILE, TELEMETRY_ENABLED)
+
+
+# 📊 Análisis
+def load_spans(path=None):
+    """Spans del fichero (o los recientes en memoria si no se indica)."""
+    if path is None:
+        with exporter._lock:
+            return list(exporter.recent)
+    spans = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def duration_ms(record):
+    return (record["endTimeUnixNano"] - record["startTimeUnixNano"]) / 1e6
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else 0.0
+
+
+def summarize(spans, kinds=("tool", "model")):
+    """p50/p95, llamadas, errores y tokens por herramienta/modelo, de más a menos tiempo total."""
+    groups = defaultdict(list)
+    for record in spans:
+        if record["kind"] in kinds:
+            groups[(record["kind"], record["name"])].append(record)
+    rows = []
+    for (kind, name), records in groups.items():
+        durations = [duration_ms(r) for r in records]
+        attributes = [r["attributes"] for r in records]
+        rows.append({"tipo": kind, "nombre": name, "llamadas": len(records),
+                     "p50_ms": round(percentile(durations, 50), 1), "p95_ms": round(percentile(durations, 95), 1),
+                     "total_s": round(sum(durations) / 1000, 2),
+                     "errores": sum(r["status"]["code"] == "ERROR" for r in records),
+                     "cache_hits": sum(a.get("cache") == "hit" or bool(a.get("cached_tokens")) for a in attributes),
+                     "tokens": sum(a.get("input_tokens", 0) + a.get("output_tokens", 0) for a in attributes)})
+    return sorted(rows, key=lambda row: -row["total_s"])
+
+
+def traces(spans):
+    """Spans agrupados por traza, la más reciente primero."""
+    grouped = defaultdict(list)
+    for record in spans:
+        grouped[record["traceId"]].append(record)
+    return sorted(grouped.values(), key=lambda records: -min(r["startTimeUnixNano"] for r in records))
+
+
+def waterfall(records):
+    """Filas (nombre, inicio y fin en ms relativos a la traza, profundidad) en orden de inicio."""
+    by_id = {r["spanId"]: r for r in records}
+    origin = min(r["startTimeUnixNano"] for r in records)
+
+    def depth(record):
+        level = 0
+        while record["parentSpanId"] in by_id:
+            record, level = by_id[record["parentSpanId"]], level + 1
+        return level
+
+    rows = []
+    for record in sorted(records, key=lambda r: r["startTimeUnixNano"]):
+        level = depth(record)
+        rows.append({"span": f"{'  ' * level}{record['name']}", "tipo": record["kind"],
+                     "inicio_ms": round((record["startTimeUnixNano"] - origin) / 1e6, 1),
+                     "fin_ms": round((record["endTimeUnixNano"] - origin) / 1e6, 1),
+                     "error": record["status"].get("message", "")})
+    return rows
+
+
+def show_panel(max_traces=20):
+    """Panel opcional de Streamlit: cascada por consulta y p50/p95 por herramienta."""
+    import altair as alt
+    import pandas as pd
+    import streamlit as st
+
+    spans = load_spans()
+    if not spans:
+        st.caption("Sin trazas todavía")
+        return
+    st.dataframe(pd.DataFrame(summarize(spans)), use_container_width=True, hide_index=True)
+
+    recent = traces(spans)[:max_traces]
+    labels = {f"{min(recent[i], key=lambda r: r['startTimeUnixNano'])['name']} · "
+              f"{max(duration_ms(r) for r in recent[i]) / 1000:.1f}s · {recent[i][0]['traceId'][:8]}": i
+              for i in range(len(recent))}
+    choice = st.selectbox("Traza", list(labels))
+    rows = pd.DataFrame(waterfall(recent[labels[choice]]))
+    chart = alt.Chart(rows).mark_bar().encode(
+        x=alt.X("inicio_ms", title="ms"), x2="fin_ms",
+        y=alt.Y("span", sort=None, title=None), color="tipo",
+        tooltip=["span", "tipo", "inicio_ms", "fin_ms", "error"])
+    st.altair_chart(chart, use_container_width=True)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else TELEMETRY_FILE
+    print(f"{'tipo':<6} {'nombre':<40} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9} {'err':>4} {'cache':>6}")
+    for row in summarize(load_spans(source)):
+        print(f"{row['tipo']:<6} {row['nombre'][:40]:<40} {row['llamadas']:>6} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['total_s']:>9} {row['errores']:>4} {row['cache_hits']:>6}")
@@ -0,0 +1,78 @@
+"""Base de las cachés de herramientas: TTL, LRU y coalescencia de llamadas idénticas en vuelo."""
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from common.telemetry import annotate
+
+
+def is_error(result):
+    """Agno convierte las excepciones de una herramienta en "Error: ..."; eso no se cachea."""
+    return isinstance(result, str) and result.lstrip().lower().startswith("error")
+
+
+class CoalescingCache:
+    """Resultados por (herramienta, argumentos) con TTL y una sola llamada en vuelo por clave.
+
+    La subclase decide cómo arranca la llamada (hilo, tarea de asyncio...):
+    basta con que devuelva algo con `add_done_callback`, `cancelled`,
+    `exception` y `result`, como `concurrent.futures.Future` o `asyncio.Task`.
+    Quien espere ese future debe hacerlo con `asyncio.shield`, para que
+    cancelar a un llamador no cancele la llamada compartida.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.stats = Counter()
+        self._entries = OrderedDict()  # clave -> (expira, resultado)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, kwargs):
+        return f"{name}:{json.dumps(kwargs, sort_keys=True, default=str)}"
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return True, entry[1]
+        return False, None
+
+    def _submit(self, key, start, ttl):
+        """Devuelve el future de la llamada, reutilizando uno en vuelo o creándolo con `start()`."""
+        with self._lock:
+            if key in self._inflight:
+                self.stats["coalesced"] += 1
+                annotate(cache="coalesced")
+                return self._inflight[key]
+            self.stats["misses"] += 1
+            annotate(cache="miss")
+            future = self._inflight[key] = start()
+
+        def store(done):
+            with self._lock:
+                self._inflight.pop(key, None)
+                if done.cancelled() or done.exception() is not None or is_error(done.result()):
+                    return
+                self._entries[key] = (time.monotonic() + ttl, done.result())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        future.add_done_callback(store)
+        return future
+
+    def expires_in(self, name, kwargs):
+        """Segundos de vida que le quedan a un resultado cacheado (0 si no está)."""
+        with self._lock:
+            entry = self._entries.get(self.key(name, kwargs))
+        return max(0.0, entry[0] - time.monotonic()) if entry else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.stats.clear()
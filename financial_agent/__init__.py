@@ -0,0 +1 @@
+"""Agente Financiero."""
@@ -1,16 +1,18 @@
 import streamlit as st
-import asyncio
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.team import Team
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
-from agno.tools.reasoning import ReasoningTools
-from agno.tools.calculator import CalculatorTools
-from agno.tools.newspaper4k import Newspaper4kTools
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.jobs import ACTIVE
+from common.streaming import StreamlitRenderer, follow_job, session_owner, show_job
+from common.telemetry import set_service, show_panel
+from financial_agent.orchestrator import registry, response_cache, warm
+from financial_agent.tasks import queue
+from financial_agent.tool_cache import tool_cache
 
 load_dotenv()
+set_service("financial_agent")
 
 # 🎨 Config + Título centrado
 st.set_page_config(page_title="🚀 AGNO FINANCE", layout="wide")
@@ -21,38 +23,19 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# 🧠 Orquestador único
-async def orchestrate(query, mode="team"):
-    if mode == "team":
-        # Team: 3 agentes especializados colaboran automáticamente
-        team = Team(
-            mode="coordinate",
-            model=OpenAIChat(id="gpt-4o-mini"),
-            members=[
-                Agent(name="Web Researcher", tools=[DuckDuckGoTools(), Newspaper4kTools()]),
-                Agent(name="Financial Analyst", tools=[YFinanceTools(), CalculatorTools()]),
-                Agent(name="AI Synthesizer", tools=[ReasoningTools()])
-            ],
-            instructions="Colaboren para análisis completos usando sus herramientas especializadas",
-            markdown=True
-        )
-        response = await team.arun(query)
-    else:
-        # Single: Un super agente con todas las herramientas
-        agent = Agent(
-            model=OpenAIChat(id="gpt-4o-mini"),
-            tools=[DuckDuckGoTools(), Newspaper4kTools(), YFinanceTools(), 
-                   CalculatorTools(), ReasoningTools()],
-            instructions="Usa herramientas en secuencia inteligente para análisis completos",
-            markdown=True
-        )
-        response = await agent.arun(query)
-    return response.content
+# ♻️ Agentes pre-construidos, compartidos por todas las sesiones del proceso
+@st.cache_resource
+def warm_agents():
+    warm()
+    return registry
+
+warm_agents()
 
 # 🎯 Configuración
 col1, col2 = st.columns([1, 2])
 with col1:
-    mode = st.radio("🎯 Modo:", ["🤝 Team", "⚡ Single"], horizontal=True)
+    mode = st.radio("🎯 Modo:", ["🤝 Team", "⚡ Single", "🔀 Fan-out"], horizontal=True,
+                    help="Fan-out: analiza cada ticker de la consulta en paralelo y luego sintetiza")
 with col2:
     st.selectbox("🛠️ Herramientas Disponibles:", [
         "🔍 DuckDuckGo - Búsqueda web instantánea",
@@ -80,17 +63,31 @@ query = st.text_area(
     placeholder="Ejemplo: Busca noticias de Apple, analiza su precio y calcula el ROI de una inversión de $1000..."
 )
 
-# 🚀 Botón de ejecución
+# 🚀 Botón de ejecución: el análisis corre en la cola de trabajos y la sesión lo sigue en vivo
 if st.button("🚀 Ejecutar") and query:
-    with st.spinner("🤖 Orquestando..."):
-        try:
-            mode_key = "team" if "Team" in mode else "single"
-            response = asyncio.run(orchestrate(query, mode_key))
-            st.success("✅ Completado!")
-            st.markdown(response)
-        except Exception as e:
-            st.error(f"❌ {e}")
+    mode_key = "team" if "Team" in mode else "fanout" if "Fan-out" in mode else "single"
+    st.session_state.job_id = queue.submit("analysis", {"query": query, "mode": mode_key}, session_owner())
+
+job = queue.get(st.session_state.job_id) if st.session_state.get("job_id") else None
+if job and job["status"] in ACTIVE:
+    # Tokens y herramientas llegan por eventos en memoria; tras un rerun se retoma desde el parcial
+    job = follow_job(queue, job, StreamlitRenderer("🤖 Orquestando..."))
+show_job(job)
+if job and job["status"] == "done":
+    st.markdown(job["result"])
+    st.success("✅ Completado!")
+    stats = tool_cache.stats
+    st.caption(f"🗄️ Caché de herramientas: {stats['hits']} hits · {stats['coalesced']} coalescidas · {stats['misses']} misses")
+    semantic = response_cache.snapshot()
+    st.caption(f"🧠 Caché semántica: {semantic['hit_rate']:.0%} de aciertos · {semantic.get('hits', 0)} hits · "
+               f"{semantic.get('misses', 0)} misses · {semantic['entries']} respuestas")
 
 # 🔧 Init
 if 'query' not in st.session_state: 
-    st.session_state.query = ""
\ No newline at end of file
+    st.session_state.query = ""
+
+# 📊 Telemetría: cascada por consulta y p50/p95 por herramienta
+if st.sidebar.checkbox("📊 Telemetría"):
+    with st.expander("📊 Telemetría", expanded=True):
+        show_panel()
+
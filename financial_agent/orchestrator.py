@@ -0,0 +1,200 @@
+"""Construcción de agentes y orquestación de consultas financieras."""
+import asyncio
+import os
+import re
+
+from agno.agent import Agent
+from agno.team import Team
+from agno.tools.calculator import CalculatorTools
+from agno.tools.duckduckgo import DuckDuckGoTools
+from agno.tools.newspaper4k import Newspaper4kTools
+from agno.tools.reasoning import ReasoningTools
+from agno.tools.yfinance import YFinanceTools
+
+from common.registry import AgentRegistry, chat_model
+from common.streaming import stream_run
+from common.telemetry import annotate, span
+from financial_agent.semantic_cache import SemanticCache
+from financial_agent.tool_cache import cached, recording
+
+registry = AgentRegistry()
+
+# ⚙️ Defaults del modo fan-out (sobrescribibles por variables de entorno)
+FANOUT_CONCURRENCY = int(os.getenv("FIN_FANOUT_CONCURRENCY", 4))
+BRANCH_TIMEOUT = float(os.getenv("FIN_BRANCH_TIMEOUT", 90))
+MAX_TICKERS = int(os.getenv("FIN_MAX_TICKERS", 5))
+
+# Nombres frecuentes -> ticker; lo que no esté aquí lo resuelve el agente extractor
+KNOWN_TICKERS = {
+    "apple": "AAPL", "microsoft": "MSFT", "google": "GOOGL", "alphabet": "GOOGL", "amazon": "AMZN",
+    "meta": "META", "facebook": "META", "netflix": "NFLX", "tesla": "TSLA", "ford": "F",
+    "general motors": "GM", "nvidia": "NVDA", "amd": "AMD", "intel": "INTC", "ibm": "IBM",
+    "bancolombia": "CIB", "ecopetrol": "EC", "bitcoin": "BTC-USD", "ethereum": "ETH-USD",
+}
+# Palabras comunes en español: solo cuentan en mayúscula y fuera del inicio de frase ("la meta de inflación")
+AMBIGUOUS_NAMES = {"meta"}
+NOT_TICKERS = {"ROI", "IA", "AI", "USD", "COP", "EUR", "PIB", "CEO", "EPS", "PER", "VS", "ETF", "EEUU", "API"}
+
+
+@registry.register("team")
+def build_team():
+    # Team: 3 agentes especializados colaboran automáticamente
+    return Team(
+        mode="coordinate",
+        model=chat_model("gpt-4o-mini"),
+        members=[
+            Agent(name="Web Researcher", model=chat_model("gpt-4o"), tools=[cached(DuckDuckGoTools()), cached(Newspaper4kTools())]),
+            Agent(name="Financial Analyst", model=chat_model("gpt-4o"), tools=[cached(YFinanceTools()), CalculatorTools()]),
+            Agent(name="AI Synthesizer", model=chat_model("gpt-4o"), tools=[ReasoningTools()])
+        ],
+        instructions="Colaboren para análisis completos usando sus herramientas especializadas",
+        markdown=True
+    )
+
+
+@registry.register("single")
+def build_single():
+    # Single: Un super agente con todas las herramientas
+    return Agent(
+        model=chat_model("gpt-4o-mini"),
+        tools=[cached(DuckDuckGoTools()), cached(Newspaper4kTools()), cached(YFinanceTools()),
+               CalculatorTools(), ReasoningTools()],
+        instructions="Usa herramientas en secuencia inteligente para análisis completos",
+        markdown=True
+    )
+
+
+@registry.register("extractor")
+def build_extractor():
+    return Agent(
+        model=chat_model("gpt-4o-mini"),
+        instructions="Devuelve solo los tickers bursátiles de las empresas o activos mencionados, separados por comas",
+    )
+
+
+@registry.register("branch")
+def build_branch():
+    # Fan-out: investigación + análisis de un único ticker
+    return Agent(
+        model=chat_model("gpt-4o"),
+        tools=[cached(DuckDuckGoTools()), cached(Newspaper4kTools()), cached(YFinanceTools()), CalculatorTools()],
+        instructions="Investiga noticias y analiza las finanzas de un único ticker; responde con datos concretos",
+        markdown=True
+    )
+
+
+@registry.register("synthesizer")
+def build_synthesizer():
+    return Agent(
+        model=chat_model("gpt-4o"),
+        instructions="Combina los análisis por ticker en una única respuesta comparativa a la consulta original",
+        markdown=True
+    )
+
+
+def warm():
+    for mode in ("team", "single"):
+        registry.warm(mode)
+    registry.warm("branch", count=FANOUT_CONCURRENCY)
+    registry.warm("synthesizer")
+
+
+# 🔀 Fan-out por ticker
+def _sentence_start(text, index):
+    before = text[:index].rstrip()
+    return not before or before[-1] in ".!?¿¡:"
+
+
+def find_tickers(query):
+    """Tickers explícitos (mayúsculas) o empresas conocidas, en orden de aparición."""
+    found = []
+    for name, ticker in KNOWN_TICKERS.items():
+        if name in AMBIGUOUS_NAMES:
+            matches = re.finditer(rf"\b{re.escape(name.capitalize())}\b", query)
+            match = next((m for m in matches if not _sentence_start(query, m.start())), None)
+        else:
+            match = re.search(rf"\b{re.escape(name)}\b", query, re.IGNORECASE)
+        if match:
+            found.append((match.start(), ticker))
+    for match in re.finditer(r"\b[A-Z]{1,5}(?:-[A-Z]{3})?\b", query):
+        if match.group() not in NOT_TICKERS and len(match.group()) > 1:
+            found.append((match.start(), match.group()))
+    return list(dict.fromkeys(ticker for _, ticker in sorted(found)))[:MAX_TICKERS]
+
+
+async def extract_tickers(query):
+    tickers = find_tickers(query)
+    if tickers:
+        return tickers
+    with registry.lease("extractor") as extractor:
+        response = await extractor.arun(query)
+    return find_tickers(response.content or "")
+
+
+async def _run_branch(ticker, query, semaphore, on_tool=None):
+    prompt = f"Consulta original: {query}\n\nAnaliza únicamente {ticker}: precio, fundamentales y noticias recientes."
+    async with semaphore:
+        try:
+            with registry.lease("branch") as runner:
+                if on_tool:
+                    return await asyncio.wait_for(stream_run(runner, prompt, on_tool=on_tool), BRANCH_TIMEOUT)
+                response = await asyncio.wait_for(runner.arun(prompt), BRANCH_TIMEOUT)
+                return response.content
+        except asyncio.TimeoutError:
+            return f"⚠️ Sin datos: el análisis de {ticker} superó {BRANCH_TIMEOUT:.0f}s"
+        except Exception as e:
+            return f"⚠️ Sin datos: el análisis de {ticker} falló ({e})"
+
+
+async def fan_out(query, on_content=None, on_tool=None, concurrency=None):
+    """Analiza cada ticker en paralelo y sintetiza una sola respuesta.
+
+    La latencia se acerca a la de la rama más lenta en vez de a la suma de todas.
+    Sin tickers reconocibles se delega en el modo "single".
+    """
+    tickers = await extract_tickers(query)
+    if not tickers:
+        return await _run(query, "single", on_content, on_tool)
+
+    semaphore = asyncio.Semaphore(concurrency or FANOUT_CONCURRENCY)
+    results = await asyncio.gather(*[_run_branch(t, query, semaphore, on_tool) for t in tickers])
+    if any((result or "").startswith("⚠️ Sin datos") for result in results):
+        annotate(degraded=True)
+    sections = "\n\n".join(f"## {ticker}\n{result}" for ticker, result in zip(tickers, results))
+    return await _run(f"Consulta: {query}\n\nAnálisis por ticker:\n\n{sections}", "synthesizer", on_content, on_tool)
+
+
+# 🧠 Orquestador único
+response_cache = SemanticCache(ticker_fn=find_tickers)
+
+
+async def orchestrate(query, mode="team", on_content=None, on_tool=None):
+    """Ejecuta la consulta; con callbacks, la respuesta se emite en stream a medida que llega.
+
+    Una pregunta casi idéntica a otra reciente se responde desde la caché semántica.
+    """
+    with span("orchestrate", "run", mode=mode, query=query[:200]) as current:
+        hit = await asyncio.to_thread(response_cache.lookup, query, mode)
+        if hit is not None:
+            current.set(cache="hit", similarity=hit.similarity, age_s=hit.age_s)
+            if on_content:
+                on_content(hit.answer)
+            return hit.answer
+
+        with recording() as calls:
+            if mode == "fanout":
+                answer = await fan_out(query, on_content, on_tool)
+            else:
+                answer = await _run(query, mode, on_content, on_tool)
+        # Una respuesta con ramas sin datos no debe quedar fijada en la caché
+        if not current.attributes.get("degraded"):
+            await asyncio.to_thread(response_cache.store, query, mode, answer, calls)
+        return answer
+
+
+async def _run(query, mode, on_content=None, on_tool=None):
+    with registry.lease(mode) as runner:
+        if on_content or on_tool:
+            return await stream_run(runner, query, on_content, on_tool)
+        response = await runner.arun(query)
+    return response.content
@@ -0,0 +1,231 @@
+"""Caché semántica de respuestas delante de `orchestrate`.
+
+Las preguntas casi idénticas ("Analiza acciones de Apple + noticias" /
+"analiza las acciones de apple y sus noticias") reutilizan la respuesta si
+su embedding está cerca, mencionan los mismos tickers, cifras y negaciones
+("sin noticias", "no analices"), usan el mismo modo y la respuesta sigue
+fresca. La frescura depende del tema de la pregunta (TTL por tema) y de los
+datos de herramientas que usó: una respuesta que consultó el precio caduca
+con el precio, así que no hace falta invalidarla cuando esos datos se refrescan.
+"""
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from financial_agent.tool_cache import DEFAULT_TTL, TOOL_TTLS, tool_cache
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+CACHE_ENABLED = os.getenv("FIN_SEMANTIC_CACHE", "1") not in ("0", "false", "no")
+EMBED_MODEL = os.getenv("FIN_EMBED_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")  # "ngram" fuerza el fallback
+THRESHOLD = float(os.getenv("FIN_CACHE_THRESHOLD", 0)) or None  # sin fijar: el del embedder
+MAX_ENTRIES = int(os.getenv("FIN_CACHE_ENTRIES", 2000))
+NGRAM_DIM = 2 ** 11
+
+# ⏱️ TTL por tema (segundos); FIN_CACHE_TTLS="precio=60,noticias=600" los sobrescribe
+TOPIC_TTLS = {"precio": 60, "noticias": 10 * 60, "analistas": 3600, "fundamentales": 6 * 3600, "general": 5 * 60}
+TOPIC_KEYWORDS = {
+    "precio": ("precio", "cotiza", "vale", "price", "cuanto esta", "hoy"),
+    "noticias": ("noticia", "news", "ultima", "reciente"),
+    "analistas": ("recomendacion", "analista", "rating", "target"),
+    "fundamentales": ("fundamental", "ratio", "balance", "ingreso", "estado financiero", "per ", "eps", "margen"),
+}
+for _item in filter(None, os.getenv("FIN_CACHE_TTLS", "").split(",")):
+    _topic, _, _seconds = _item.partition("=")
+    TOPIC_TTLS[_topic.strip()] = float(_seconds)
+
+logger = logging.getLogger(__name__)
+
+_STOPWORDS = {"de", "la", "el", "las", "los", "y", "e", "a", "en", "del", "al", "un", "una", "sus", "su", "me",
+              "por", "para", "con", "que", "lo", "se", "favor", "porfa", "the", "of", "and", "please"}
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+# Cambian el sentido sin mover apenas el embedding: deben coincidir, como las cifras
+_NEGATIONS = {"no", "sin", "ni", "nunca", "excepto", "salvo", "not", "without", "except", "never"}
+
+
+# 🔤 Normalización y embeddings
+def normalize(query):
+    """Minúsculas, sin tildes ni signos y sin palabras vacías."""
+    text = unicodedata.normalize("NFKD", query.lower()).encode("ascii", "ignore").decode()
+    words = re.findall(r"[a-z0-9]+(?:[.,][0-9]+)?", text)
+    return " ".join(w for w in words if w not in _STOPWORDS)
+
+
+class NgramEmbedder:
+    """n-gramas de caracteres (3-5) con hashing en NGRAM_DIM cubetas, normalizados L2."""
+
+    name = "ngram"
+    threshold = 0.9
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), NGRAM_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            padded = f" {text} "
+            grams = [padded[i:i + n] for n in (3, 4, 5) for i in range(len(padded) - n + 1)]
+            np.add.at(vectors[row], [zlib.crc32(g.encode()) % NGRAM_DIM for g in grams], 1.0)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class SentenceEmbedder:
+    threshold = 0.92
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = model_name
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def load_embedder():
+    """Modelo local si está disponible; n-gramas de caracteres en caso contrario."""
+    if EMBED_MODEL != "ngram":
+        try:
+            return SentenceEmbedder(EMBED_MODEL)
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.warning("No se pudo cargar %s, se usan n-gramas: %s", EMBED_MODEL, e)
+    return NgramEmbedder()
+
+
+def topic(query):
+    text = normalize(query) + " "
+    for name, keywords in TOPIC_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return name
+    return "general"
+
+
+def data_ttl(calls):
+    """Vida restante de los datos usados: lo que le quede al más perecedero en la caché de herramientas."""
+    remaining = [tool_cache.expires_in(name, kwargs) or TOOL_TTLS.get(name, DEFAULT_TTL) for name, kwargs in calls]
+    return min(remaining) if remaining else None
+
+
+# 🗂️ Índice en memoria
+@dataclass
+class Entry:
+    query: str
+    mode: str
+    answer: str
+    tickers: frozenset
+    numbers: frozenset
+    negations: frozenset
+    topic: str
+    created_at: float
+    expires_at: float
+
+
+@dataclass
+class Hit:
+    answer: str
+    similarity: float
+    age_s: float
+    query: str
+
+
+class SemanticCache:
+    """Vectores en una matriz NumPy; una búsqueda es un producto matricial y unos filtros."""
+
+    def __init__(self, embedder=None, threshold=THRESHOLD, max_entries=MAX_ENTRIES, ticker_fn=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = CACHE_ENABLED
+        self.stats = Counter()
+        self._embedder = embedder
+        self._ticker_fn = ticker_fn or (lambda query: [])
+        self._entries = []
+        self._vectors = np.zeros((0, NGRAM_DIM), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self):
+        with self._lock:
+            if self._embedder is None:
+                self._embedder = load_embedder()
+        return self._embedder
+
+    def _keys(self, query):
+        normalized = normalize(query)
+        guards = (frozenset(self._ticker_fn(query)), frozenset(_NUMBER.findall(normalized)),
+                  frozenset(_NEGATIONS.intersection(normalized.split())))
+        return normalized, guards
+
+    def lookup(self, query, mode):
+        """Respuesta fresca más parecida por encima del umbral, o None."""
+        if not self.enabled:
+            return None
+        normalized, guards = self._keys(query)
+        embedder = self.embedder
+        vector = embedder.encode([normalized])[0]
+        threshold = self.threshold or embedder.threshold
+        now = time.time()
+        with self._lock:
+            if not self._entries:
+                self.stats["misses"] += 1
+                return None
+            scores = self._vectors @ vector
+            for i in np.argsort(-scores):
+                if scores[i] < threshold:
+                    break
+                entry = self._entries[i]
+                if entry.mode != mode or (entry.tickers, entry.numbers, entry.negations) != guards:
+                    continue
+                if entry.expires_at <= now:
+                    self.stats["stale"] += 1
+                    continue
+                self.stats["hits"] += 1
+                return Hit(entry.answer, round(float(scores[i]), 4), round(now - entry.created_at, 1), entry.query)
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, query, mode, answer, calls=()):
+        if not self.enabled or not answer:
+            return
+        normalized, guards = self._keys(query)
+        vector = self.embedder.encode([normalized])
+        now = time.time()
+        ttl = TOPIC_TTLS.get(topic(query), TOPIC_TTLS["general"])
+        tools_ttl = data_ttl(calls)
+        if tools_ttl is not None:
+            ttl = min(ttl, tools_ttl)
+        entry = Entry(query, mode, answer, *guards, topic(query), now, now + ttl)
+        with self._lock:
+            if self._vectors.shape[1] != vector.shape[1]:
+                self._vectors = np.zeros((0, vector.shape[1]), dtype=np.float32)
+            self._entries.append(entry)
+            self._vectors = np.vstack([self._vectors, vector])
+            self.stats["stored"] += 1
+            self._prune(now)
+
+    def _prune(self, now):
+        keep = [i for i, e in enumerate(self._entries) if e.expires_at > now][-self.max_entries:]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep]
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            size = len(self._entries)
+        return {**self.stats, "entries": size, "hit_rate": round(self.hit_rate(), 3)}
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._vectors = self._vectors[:0]
+        self.stats.clear()
@@ -0,0 +1,25 @@
+"""Trabajos en segundo plano del agente financiero."""
+from common.jobs import get_queue
+from financial_agent.orchestrator import orchestrate
+
+# Los datos de mercado caducan: un análisis idéntico solo se reutiliza unos minutos
+ANALYSIS_DEDUPE_TTL = 5 * 60
+
+queue = get_queue()
+
+
+@queue.register("analysis", dedupe_ttl=ANALYSIS_DEDUPE_TTL)
+async def analysis(ctx, query, mode="team"):
+    ctx.progress(message="🤖 Orquestando...", force=True)
+
+    # Eventos en vivo para la sesión que sigue el trabajo; SQLite (con throttle) para quien vuelva luego
+    def on_content(text):
+        ctx.emit("content", text)
+        ctx.progress(partial=text)
+
+    def on_tool(phase, tool):
+        ctx.emit("tool", phase, tool)
+        if phase == "started":
+            ctx.progress(message=f"🛠️ {getattr(tool, 'tool_name', None) or 'herramienta'}...")
+
+    return await orchestrate(query, mode, on_content=on_content, on_tool=on_tool)
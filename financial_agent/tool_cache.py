@@ -0,0 +1,94 @@
+"""Caché TTL con coalescencia de peticiones para las herramientas financieras externas."""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from common.telemetry import annotate
+from common.tool_cache import CoalescingCache
+
+# ⏱️ TTL por herramienta (segundos): cotizaciones cortas, fundamentales y artículos largos
+TOOL_TTLS = {
+    # YFinanceTools
+    "get_current_stock_price": 60,
+    "get_historical_stock_prices": 15 * 60,
+    "get_technical_indicators": 15 * 60,
+    "get_company_news": 15 * 60,
+    "get_analyst_recommendations": 60 * 60,
+    "get_company_info": 6 * 3600,
+    "get_stock_fundamentals": 6 * 3600,
+    "get_income_statements": 6 * 3600,
+    "get_key_financial_ratios": 6 * 3600,
+    # DuckDuckGoTools
+    "duckduckgo_news": 10 * 60,
+    "duckduckgo_search": 30 * 60,
+    # Newspaper4kTools
+    "read_article": 24 * 3600,
+    "get_article_data": 24 * 3600,
+}
+DEFAULT_TTL = 5 * 60
+
+
+# 🧾 Herramientas usadas por una ejecución (su frescura acota la de la respuesta en caché)
+_calls = contextvars.ContextVar("tool_calls", default=None)
+
+
+@contextmanager
+def recording():
+    """Recoge (herramienta, argumentos) de lo que se ejecute dentro, incluidas las subtareas."""
+    calls = []
+    token = _calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _calls.reset(token)
+
+
+class ToolCache(CoalescingCache):
+    """Resultados de herramientas con TTL y coalescencia de llamadas idénticas en vuelo.
+
+    Las llamadas se ejecutan en un pool de hilos (las herramientas son
+    bloqueantes) y se comparten como `concurrent.futures.Future`, así que dos
+    sesiones de Streamlit con event loops distintos esperan la misma descarga.
+    """
+
+    def __init__(self, max_entries=4096, max_workers=16):
+        super().__init__(max_entries)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-cache")
+
+    async def call(self, name, fn, kwargs, ttl):
+        calls = _calls.get()
+        if calls is not None:
+            calls.append((name, kwargs))
+        key = self.key(name, kwargs)
+        found, result = self.lookup(key)
+        if found:
+            annotate(cache="hit")
+            return result
+        future = self._submit(key, lambda: self._executor.submit(fn, **kwargs), ttl)
+        # shield: cancelar a un llamador (p. ej. el timeout de una rama) no cancela la descarga compartida
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+
+tool_cache = ToolCache()
+
+
+def cached(toolkit, ttls=None, cache=None):
+    """Envuelve las funciones de un toolkit de Agno con la caché compartida del proceso."""
+    ttls = {**TOOL_TTLS, **(ttls or {})}
+    cache = cache or tool_cache
+    for name, function in toolkit.functions.items():
+        entrypoint = function.entrypoint
+        if entrypoint is None or getattr(entrypoint, "__cached__", False):
+            continue
+
+        def make_wrapper(name, entrypoint):
+            @functools.wraps(entrypoint)
+            async def wrapper(**kwargs):
+                return await cache.call(name, entrypoint, kwargs, ttls.get(name, DEFAULT_TTL))
+            wrapper.__cached__ = True
+            return wrapper
+
+        function.entrypoint = make_wrapper(name, entrypoint)
+    return toolkit
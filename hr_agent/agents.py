@@ -0,0 +1,112 @@
+"""Agentes de RRHH: fábricas registradas y funciones de análisis de CVs."""
+from agno.agent import Agent
+from agno.team import Team
+from agno.tools.calculator import CalculatorTools
+from agno.tools.reasoning import ReasoningTools
+
+from common.registry import AgentRegistry, chat_model
+from common.streaming import stream_run
+from hr_agent.cache import ANALYSIS_TTL, analysis_key, get_cache
+from hr_agent.compaction import OPTIMIZE_TOKEN_BUDGET, compact_cv
+from hr_agent.structured import CANDIDATES_FORMAT
+
+registry = AgentRegistry()
+
+
+@registry.register("optimize")
+def build_optimizer():
+    return Agent(model=chat_model("gpt-4o"), tools=[ReasoningTools()],
+                 instructions="Experto optimización CVs. Sé específico y práctico.", markdown=True)
+
+
+@registry.register("batch")
+def build_batch_scorer():
+    # Salida restringida al esquema `Evaluacion` (JSON puro, sin markdown)
+    return Agent(model=chat_model("gpt-4o", request_params={"response_format": CANDIDATES_FORMAT}),
+                 tools=[ReasoningTools(), CalculatorTools()],
+                 instructions="Experto RRHH. SIEMPRE devuelve JSON válido con estructura exacta.")
+
+
+@registry.register("team")
+def build_scoring_team():
+    return Team(model=chat_model("gpt-4o", request_params={"response_format": CANDIDATES_FORMAT}),
+                members=[Agent(name="A", model=chat_model("gpt-4o"), tools=[ReasoningTools()], instructions="Analizar CVs y extraer información"),
+                         Agent(name="B", model=chat_model("gpt-4o"), tools=[CalculatorTools()], instructions="Puntuar candidatos del 1-100")],
+                instructions="Trabajen juntos. DEVUELVAN JSON: {candidatos: [{nombre, archivo, puntaje, experiencia_anos, skills, educacion, recomendacion}]}")
+
+
+@registry.register("offer")
+def build_offer_writer():
+    return Agent(model=chat_model("gpt-4o"), tools=[],
+                 instructions="Eres un experto en ofertas laborales. Devuelve ÚNICAMENTE el texto de la oferta, sin explicaciones adicionales.", markdown=False)
+
+
+@registry.register("linkedin")
+def build_linkedin_writer():
+    return Agent(model=chat_model("gpt-4o"), tools=[ReasoningTools()],
+                 instructions="Especialista LinkedIn. Posts virales de empleo, formato profesional.", markdown=False)
+
+
+@registry.register("chat")
+def build_results_chat():
+    return Agent(model=chat_model("gpt-4o"), tools=[ReasoningTools()],
+                 instructions="Experto RRHH. Responde consultas sobre candidatos analizados.", markdown=True)
+
+
+def warm():
+    for name in ("optimize", "batch", "offer", "chat"):
+        registry.warm(name)
+
+
+async def run_agent(name, prompt, on_content=None, on_tool=None):
+    """Ejecuta un agente del registro; con callbacks, la respuesta se emite en stream."""
+    with registry.lease(name) as agent:
+        if on_content or on_tool:
+            return await stream_run(agent, prompt, on_content, on_tool)
+        response = await agent.arun(prompt)
+    return response.content
+
+
+async def analyze_cv(content, role, mode="optimize", on_content=None, on_tool=None):
+    # 💾 Las respuestas individuales se cachean; el modo batch cachea por candidato en score_batch
+    cache_key = analysis_key(content, role, mode)
+    if mode == "optimize":
+        cached = get_cache().get("analysis", cache_key)
+        if cached is not None:
+            if on_content:
+                on_content(cached)
+            return cached
+
+    if mode == "optimize":
+        prompt = f"CV para {role}:\n{compact_cv(content, OPTIMIZE_TOKEN_BUDGET).text}\n\nAnaliza y sugiere 5 mejoras específicas, keywords faltantes y puntaje 1-10."
+    else:
+        prompt = f"""
+        Analiza estos CVs para: {role}
+        
+        {content}
+        
+        DEVUELVE JSON EXACTO:
+        {{
+          "candidatos": [
+            {{
+              "nombre": "Nombre extraído del CV",
+              "archivo": "archivo.pdf", 
+              "puntaje": 85,
+              "experiencia_anos": 5,
+              "skills": ["Python", "SQL"],
+              "educacion": "Ingeniería de Sistemas",
+              "recomendacion": "Excelente match para el cargo"
+            }}
+          ]
+        }}
+        """
+
+    content = await run_agent(mode, prompt, on_content, on_tool)
+    if mode == "optimize":
+        get_cache().set("analysis", cache_key, content, ttl=ANALYSIS_TTL)
+    return content
+
+
+async def team_score(content, job_desc, skills, exp, on_content=None):
+    return await run_agent("team", f"Analicen para cargo: {job_desc}\nSkills requeridos: {skills}\nExperiencia: {exp}años\n\nCVs:\n{content}",
+                           on_content)
@@ -1,85 +1,44 @@
 import streamlit as st
-import asyncio
-import json
 import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.team import Team
-from agno.tools.reasoning import ReasoningTools
-from agno.tools.calculator import CalculatorTools
-import PyPDF2
-import io
-import zipfile
-import tempfile
-import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.ratelimit import set_lane
+from common.streaming import StreamlitRenderer, poll, session_owner, show_job
+from common.telemetry import set_service, show_panel
+from hr_agent.agents import analyze_cv, registry, run_agent, warm
+from hr_agent.cache import get_cache
+from hr_agent.compaction import OPTIMIZE_TOKEN_BUDGET, compact_cv
+from hr_agent.extraction import cached_pdf_text
+from hr_agent.results import chat_context, get_store
+from hr_agent.retrieval import SHORTLIST_K
+from hr_agent.tasks import queue
 
 load_dotenv()
 
+# 🚦 Las llamadas hechas desde la UI (chat, optimizar, preguntas) pasan antes que el screening masivo
+set_lane("interactive")
+set_service("hr_agent")
+
 # 🎨 Config
 st.set_page_config(page_title="🧠 AGNO HR", layout="wide")
 st.markdown("<h1 style='text-align: center;'>🧠 AGNO HR</h1>", unsafe_allow_html=True)
 
-# 📄 Funciones
-def extract_pdf_text(pdf_content):
-    try:
-        return "".join([page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(pdf_content)).pages])
-    except:
-        return ""
+# ♻️ Agentes pre-construidos, compartidos por todas las sesiones del proceso
+@st.cache_resource
+def warm_agents():
+    warm()
+    return registry
 
-def process_zip(zip_file):
-    cvs_data, names = [], []
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
-        tmp.write(zip_file.read())
-        tmp_path = tmp.name
-    
-    with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-        for file_info in zip_ref.filelist:
-            if file_info.filename.lower().endswith('.pdf') and not file_info.is_dir():
-                try:
-                    text = extract_pdf_text(zip_ref.read(file_info.filename))
-                    if len(text.strip()) > 50:
-                        cvs_data.append(text[:2000])
-                        names.append(file_info.filename)
-                except:
-                    continue
-    
-    os.unlink(tmp_path)
-    return cvs_data, names
+warm_agents()
 
-# 🧠 Agentes
-async def analyze_cv(content, role, mode="optimize"):
-    if mode == "optimize":
-        prompt = f"CV para {role}:\n{content[:2500]}\n\nAnaliza y sugiere 5 mejoras específicas, keywords faltantes y puntaje 1-10."
-        agent = Agent(model=OpenAIChat(id="gpt-4o"), tools=[ReasoningTools()], 
-                     instructions="Experto optimización CVs. Sé específico y práctico.", markdown=True)
-    else:
-        prompt = f"""
-        Analiza estos CVs para: {role}
-        
-        {content}
-        
-        DEVUELVE JSON EXACTO:
-        {{
-          "candidatos": [
-            {{
-              "nombre": "Nombre extraído del CV",
-              "archivo": "archivo.pdf", 
-              "puntaje": 85,
-              "experiencia_anos": 5,
-              "skills": ["Python", "SQL"],
-              "educacion": "Ingeniería de Sistemas",
-              "recomendacion": "Excelente match para el cargo"
-            }}
-          ]
-        }}
-        """
-        agent = Agent(model=OpenAIChat(id="gpt-4o"), tools=[ReasoningTools(), CalculatorTools()], 
-                     instructions="Experto RRHH. SIEMPRE devuelve JSON válido con estructura exacta.", markdown=True)
-    
-    response = await agent.arun(prompt)
-    return response.content
+# 📮 Trabajos de esta sesión (sobreviven a los reruns: solo se guarda el ID)
+if "jobs" not in st.session_state:
+    st.session_state.jobs = {}
+active_jobs = False
 
 # 🎯 Interface
 mode = st.radio("🎯 Modo:", ["📄 Optimizar CV", "📦 Selección Masiva", "📝 Generar Oferta"], horizontal=True)
@@ -90,14 +49,17 @@ if mode == "📄 Optimizar CV":
     target_role = st.text_input("🎯 Cargo objetivo:")
     
     if st.button("🔍 Analizar") and uploaded_file and target_role:
-        with st.spinner("Analizando..."):
-            content = extract_pdf_text(uploaded_file.read()) if uploaded_file.type == "application/pdf" else str(uploaded_file.read(), "utf-8")
-            if content.strip():
-                analysis = asyncio.run(analyze_cv(content, target_role, "optimize"))
-                st.markdown("### 📊 Análisis:")
-                st.markdown(analysis)
-            else:
-                st.error("❌ No se pudo extraer texto")
+        content = cached_pdf_text(uploaded_file.read()) if uploaded_file.type == "application/pdf" else str(uploaded_file.read(), "utf-8")
+        if content.strip():
+            report = compact_cv(content, OPTIMIZE_TOKEN_BUDGET)
+            st.caption(f"✂️ CV compactado: {report.tokens_before} → {report.tokens_after} tokens")
+            st.markdown("### 📊 Análisis:")
+            renderer = StreamlitRenderer("Analizando...")
+            analysis = queue.run_interactive(analyze_cv, content, target_role, "optimize",
+                                             on_content=renderer.on_content, on_tool=renderer.on_tool)
+            renderer.done(analysis)
+        else:
+            st.error("❌ No se pudo extraer texto")
 
 elif mode == "📝 Generar Oferta":
     # Generador de ofertas
@@ -113,87 +75,67 @@ elif mode == "📝 Generar Oferta":
         modality = st.selectbox("🏠 Modalidad:", ["Presencial", "Remoto", "Híbrido"])
     
     if st.button("📝 Generar Oferta") and job_title and company_name and job_desc:
-        with st.spinner("Generando oferta profesional..."):
-            offer_prompt = f"""
-            Crea una oferta laboral profesional para: {job_title} en {company_name}
+        st.session_state.jobs["offer"] = queue.submit("offer", {
+            "job_title": job_title, "company_name": company_name, "job_desc": job_desc,
+            "location": location, "modality": modality, "salary_range": salary_range}, session_owner())
+
+    job = queue.get(st.session_state.jobs["offer"]) if "offer" in st.session_state.jobs else None
+    if show_job(job):
+        active_jobs = True
+        if job["partial"]:
+            st.text(job["partial"] + " ▌")
+    elif job and job["status"] == "done":
+        offer = job["result"]
+
+        # Limpiar respuesta si tiene metadata
+        clean_offer = offer if isinstance(offer, str) else str(offer)
+        # Extraer solo el texto principal si hay metadata
+        if "based on the gathered information" in clean_offer or "ReasoningStep" in clean_offer:
+            # Buscar el texto real de la oferta
+            lines = clean_offer.split('\n')
+            clean_lines = []
+            for line in lines:
+                if not any(x in line.lower() for x in ['reasoning', 'metadata', 'confidence', 'next_action', 'based on']):
+                    clean_lines.append(line)
+            clean_offer = '\n'.join(clean_lines).strip()
+        
+        st.markdown("### 📋 Oferta Laboral Generada:")
+        st.text_area("📄 Oferta completa:", value=clean_offer, height=400, disabled=True)
+        
+        # Botón para generar versión LinkedIn
+        if st.button("🔗 Versión para LinkedIn"):
+            linkedin_prompt = f"""
+            Convierte esta oferta en post LinkedIn profesional pero atractivo:
             
-            Descripción: {job_desc}
-            Ubicación: {location} | Modalidad: {modality} | Salario: {salary_range}
+            {offer[:1000]}
             
-            GENERA OFERTA PROFESIONAL:
+            ESTRUCTURA LINKEDIN:
+            🚀 Hook inicial impactante
+            📍 {location} | {modality} | {salary_range}
             
-            🔸 TÍTULO ATRACTIVO (optimizado para búsquedas)
-            🔸 SOBRE LA EMPRESA (2-3 líneas que generen interés)
-            🔸 MISIÓN DEL CARGO (qué impacto tendrá)
-            🔸 RESPONSABILIDADES CLAVE (5 principales, específicas)
-            🔸 REQUISITOS OBLIGATORIOS (técnicos y experiencia)
-            🔸 REQUISITOS DESEABLES (que marquen diferencia)  
-            🔸 QUÉ OFRECEMOS (beneficios atractivos y competitivos)
-            🔸 PROCESO DE SELECCIÓN (pasos claros)
-            🔸 CALL TO ACTION (cómo aplicar)
+            Lo que harás:
+            • [Responsabilidad top]
+            • [Responsabilidad top]
             
-            IMPORTANTE: 
-            - Usa lenguaje profesional pero cercano
-            - Incluye keywords para ATS (sistemas de tracking)
-            - Que sea atractivo para candidatos top
-            - Sin asteriscos, solo texto limpio y viñetas (•)
-            """
+            Buscamos:
+            • [Requisito clave]
+            • [Requisito clave]
             
-            offer_agent = Agent(model=OpenAIChat(id="gpt-4o"), tools=[], 
-                              instructions="Eres un experto en ofertas laborales. Devuelve ÚNICAMENTE el texto de la oferta, sin explicaciones adicionales.", markdown=False)
-            offer = asyncio.run(offer_agent.arun(offer_prompt))
+            Ofrecemos:
+            • [Beneficio atractivo]
+            • [Beneficio atractivo]
             
-            # Limpiar respuesta si tiene metadata
-            clean_offer = offer.content if hasattr(offer, 'content') else str(offer)
-            # Extraer solo el texto principal si hay metadata
-            if "based on the gathered information" in clean_offer or "ReasoningStep" in clean_offer:
-                # Buscar el texto real de la oferta
-                lines = clean_offer.split('\n')
-                clean_lines = []
-                for line in lines:
-                    if not any(x in line.lower() for x in ['reasoning', 'metadata', 'confidence', 'next_action', 'based on']):
-                        clean_lines.append(line)
-                clean_offer = '\n'.join(clean_lines).strip()
+            👥 Etiqueta a alguien que le interese
+            🔗 Aplica en comentarios o DM
             
-            st.markdown("### 📋 Oferta Laboral Generada:")
-            st.text_area("📄 Oferta completa:", value=clean_offer, height=400, disabled=True)
+            [3-4 hashtags relevantes]
             
-            # Botón para generar versión LinkedIn
-            if st.button("🔗 Versión para LinkedIn"):
-                linkedin_prompt = f"""
-                Convierte esta oferta en post LinkedIn profesional pero atractivo:
-                
-                {offer[:1000]}
-                
-                ESTRUCTURA LINKEDIN:
-                🚀 Hook inicial impactante
-                📍 {location} | {modality} | {salary_range}
-                
-                Lo que harás:
-                • [Responsabilidad top]
-                • [Responsabilidad top]
-                
-                Buscamos:
-                • [Requisito clave]
-                • [Requisito clave]
-                
-                Ofrecemos:
-                • [Beneficio atractivo]
-                • [Beneficio atractivo]
-                
-                👥 Etiqueta a alguien que le interese
-                🔗 Aplica en comentarios o DM
-                
-                [3-4 hashtags relevantes]
-                
-                MÁXIMO 280 caracteres. Solo texto plano, sin markdown.
-                """
-                linkedin_agent = Agent(model=OpenAIChat(id="gpt-4o"), tools=[ReasoningTools()], 
-                                     instructions="Especialista LinkedIn. Posts virales de empleo, formato profesional.", markdown=False)
-                linkedin_post = asyncio.run(linkedin_agent.arun(linkedin_prompt))
-                
-                st.markdown("### 🔗 Post para LinkedIn:")
-                st.text_area("📱 Post LinkedIn:", value=linkedin_post, height=200, disabled=True)
+            MÁXIMO 280 caracteres. Solo texto plano, sin markdown.
+            """
+            linkedin_post = queue.run_interactive(run_agent, "linkedin", linkedin_prompt)
+            
+            st.markdown("### 🔗 Post para LinkedIn:")
+            st.text_area("📱 Post LinkedIn:", value=linkedin_post, height=200, disabled=True)
 
 else:
     # Modo masivo
@@ -206,6 +148,8 @@ else:
     with col2:
         exp = st.number_input("📅 Exp:", 0, 30, 2)
         location = st.text_input("📍 Ubicación:")
+        top_k = st.number_input("🎯 Preselección (top-K, 0 = todos):", 0, 1000, SHORTLIST_K,
+                                help="Solo los CVs más afines al cargo se puntúan con el LLM")
 
     # Session state
     if "results" not in st.session_state:
@@ -214,69 +158,74 @@ else:
         st.session_state.interviews = []
 
     if st.button("🚀 Analizar") and zip_file and job_desc:
-        with st.spinner("Procesando..."):
-            cvs_data, names = process_zip(zip_file)
-            if cvs_data:
-                content = "\n---\n".join([f"{n}: {cv}" for cv, n in zip(cvs_data, names)])
-                
-                if "Team" in team_mode:
-                    team = Team(model=OpenAIChat(id="gpt-4o"), 
-                               members=[Agent(name="A", tools=[ReasoningTools()], instructions="Analizar CVs y extraer información"),
-                                       Agent(name="B", tools=[CalculatorTools()], instructions="Puntuar candidatos del 1-100")],
-                               instructions="Trabajen juntos. DEVUELVAN JSON: {candidatos: [{nombre, archivo, puntaje, skills, educacion, recomendacion}]}", markdown=True)
-                    response = asyncio.run(team.arun(f"Analicen para cargo: {job_desc}\nSkills requeridos: {skills}\nExperiencia: {exp}años\n\nCVs:\n{content}"))
-                    result_text = response.content
-                else:
-                    result_text = asyncio.run(analyze_cv(content, f"{job_desc}. Skills: {skills}. Exp: {exp}años", "batch"))
-                
-                # Parsear JSON
-                try:
-                    if "```json" in result_text:
-                        result_text = result_text.split("```json")[1].split("```")[0]
-                    elif "```" in result_text:
-                        result_text = result_text.split("```")[1].split("```")[0]
-                    
-                    results = json.loads(result_text)
-                    st.session_state.results = results
-                    
-                    if "candidatos" in results:
-                        df = pd.DataFrame(results["candidatos"]).sort_values("puntaje", ascending=False)
-                        st.success(f"✅ {len(df)} candidatos analizados")
-                        
-                        # Mostrar tabla completa con todas las columnas
-                        display_cols = ["nombre", "puntaje", "skills", "educacion", "recomendacion"]
-                        available_cols = [col for col in display_cols if col in df.columns]
-                        st.dataframe(df[available_cols], use_container_width=True)
-                    else:
-                        st.markdown("### 📊 Resultados:")
-                        st.markdown(result_text)
-                        
-                except json.JSONDecodeError:
-                    # Si falla JSON, mostrar resultado directo
-                    st.markdown("### 📊 Análisis:")
-                    st.markdown(result_text)
-                    # Crear estructura básica para funcionalidades
-                    st.session_state.results = {
-                        "candidatos": [{"nombre": f"Candidato {i+1}", "puntaje": 75, "recomendacion": "Analizado"} 
-                                     for i in range(len(names))]
-                    }
-            else:
-                st.error("❌ No se encontraron CVs")
+        st.session_state.jobs["screening"] = queue.submit("screening", {
+            "zip_bytes": zip_file.getvalue(), "job_desc": job_desc, "skills": skills, "exp": exp,
+            "team": "Team" in team_mode, "top_k": top_k}, session_owner())
+
+    job = queue.get(st.session_state.jobs["screening"]) if "screening" in st.session_state.jobs else None
+    display_cols = ["nombre", "puntaje", "similitud", "skills", "educacion", "recomendacion"]
+    if show_job(job):
+        active_jobs = True
+        if job["partial"]:
+            # Resultados parciales: filas ya puntuadas mientras siguen llegando lotes
+            partial = pd.DataFrame(job["partial"])
+            st.dataframe(partial[[col for col in display_cols if col in partial.columns]], use_container_width=True)
+    elif job and job["status"] == "done":
+        result = job["result"]
+        if result["preselection"]:
+            pre = result["preselection"]
+            st.caption(f"🎯 Preselección ({pre['backend']}): {pre['shortlisted']} de {pre['total']} CVs enviados al LLM")
+        if result["compaction"]:
+            saved = sum(r["ahorro"] for r in result["compaction"])
+            with st.expander(f"✂️ CVs compactados · {saved} tokens ahorrados"):
+                st.dataframe(pd.DataFrame(result["compaction"]), use_container_width=True)
+        if result["candidatos"]:
+            # Solo al terminar: después manda lo que se elija en el historial
+            if st.session_state.get("last_run") != result["run_id"]:
+                st.session_state.last_run = result["run_id"]
+                st.session_state.results = {"run_id": result["run_id"]}
+            st.success(f"✅ {len(result['candidatos'])} candidatos analizados")
+        elif result["compaction"]:
+            st.error("❌ No se pudo puntuar ningún CV")
+        else:
+            st.error("❌ No se encontraron CVs")
+        if result["unscored"]:
+            st.warning(f"⚠️ Sin puntuar tras reintentos: {', '.join(result['unscored'])}")
+            for error in result.get("errors", []):
+                st.caption(f"↳ {error}")
+        stats = get_cache().stats()
+        st.caption(f"💾 Caché: {stats['hits']} hits / {stats['misses']} misses · {stats['entries']} entradas")
+
+    # 🗂️ Histórico: cualquier ejecución anterior (de esta u otra sesión) se puede reabrir
+    store = get_store()
+    runs = store.runs()
+    if runs:
+        labels = {f"{datetime.fromtimestamp(r['created_at']):%Y-%m-%d %H:%M} · {r.get('cargo', '')[:40]} · "
+                  f"{r['candidatos']} candidatos": r["run_id"] for r in runs}
+        current = (st.session_state.results or {}).get("run_id")
+        ids = list(labels.values())
+        choice = st.selectbox("🗂️ Historial:", list(labels), index=ids.index(current) if current in ids else 0)
+        st.session_state.results = {"run_id": labels[choice]}
+
+    run_id = (st.session_state.results or {}).get("run_id")
+    if run_id:
+        df = store.load(run_id)
+        st.dataframe(df[[col for col in display_cols if col in df.columns]], use_container_width=True)
 
     # Extras para modo masivo
-    if st.session_state.results and "candidatos" in st.session_state.results:
+    if run_id and len(df) > 0:
         col1, col2 = st.columns(2)
         with col1:
             if st.button("❓ Preguntas para #1"):
-                df = pd.DataFrame(st.session_state.results["candidatos"])
-                if len(df) > 0:
-                    top = df.sort_values("puntaje", ascending=False).iloc[0]
-                    questions = asyncio.run(analyze_cv(f"Candidato: {top['nombre']}, Skills: {top.get('skills', [])}", job_desc, "optimize"))
-                    st.markdown(f"### 🎤 Preguntas para {top['nombre']}:")
-                    st.markdown(questions)
+                top = store.top(run_id, 1).iloc[0]
+                st.markdown(f"### 🎤 Preguntas para {top['nombre']}:")
+                renderer = StreamlitRenderer("Preparando preguntas...")
+                questions = queue.run_interactive(analyze_cv, f"Candidato: {top['nombre']}, Skills: {list(top['skills'])}", job_desc, "optimize",
+                                                  on_content=renderer.on_content, on_tool=renderer.on_tool)
+                renderer.done(questions)
         
         with col2:
-            candidates = [c["nombre"] for c in st.session_state.results["candidatos"]]
+            candidates = df["nombre"].dropna().tolist()
             if candidates:
                 selected = st.selectbox("📅 Agendar:", candidates)
                 if st.button("📅 Agendar"):
@@ -292,14 +241,12 @@ else:
         
         if st.button("📤 Preguntar") and user_q:
             with st.spinner("Analizando..."):
-                df_str = pd.DataFrame(st.session_state.results["candidatos"]).to_string()
-                chat_prompt = f"Pregunta: {user_q}\nDatos candidatos: {df_str}\nCargo: {job_desc}\nResponde basándote solo en estos datos."
+                # Solo las filas y columnas que la pregunta necesita, más un resumen agregado
+                chat_prompt = f"Pregunta: {user_q}\nDatos candidatos:\n{chat_context(user_q, df)}\nCargo: {job_desc}\nResponde basándote solo en estos datos."
                 
-                agent = Agent(model=OpenAIChat(id="gpt-4o"), tools=[ReasoningTools()], 
-                             instructions="Experto RRHH. Responde consultas sobre candidatos analizados.", markdown=True)
-                answer = asyncio.run(agent.arun(chat_prompt))
+                answer = queue.run_interactive(run_agent, "chat", chat_prompt)
                 
-                st.markdown(f"**🤖 Respuesta:** {answer.content}")
+                st.markdown(f"**🤖 Respuesta:** {answer}")
 
 # Info
 if mode == "📄 Optimizar CV" and (not uploaded_file or not target_role):
@@ -307,4 +254,11 @@ if mode == "📄 Optimizar CV" and (not uploaded_file or not target_role):
 elif mode == "📦 Selección Masiva" and (not zip_file or not job_desc):
     st.info("📦 Sube ZIP con CVs y describe el cargo")
 elif mode == "📝 Generar Oferta" and (not job_title or not company_name or not job_desc):
-    st.info("📝 Completa título, empresa y descripción del cargo")
\ No newline at end of file
+    st.info("📝 Completa título, empresa y descripción del cargo")
+
+# 📊 Telemetría: cascada por consulta y p50/p95 por herramienta
+if st.sidebar.checkbox("📊 Telemetría"):
+    with st.expander("📊 Telemetría", expanded=True):
+        show_panel()
+
+poll(active_jobs)
@@ -0,0 +1,115 @@
+"""Caché en disco (SQLite) direccionada por contenido para textos de PDF y análisis de CVs."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+CACHE_DIR = Path(os.getenv("HR_CACHE_DIR", Path.home() / ".cache" / "agno-hr"))
+CACHE_MAX_MB = float(os.getenv("HR_CACHE_MAX_MB", 256))
+PDF_TTL = 30 * 24 * 3600
+ANALYSIS_TTL = 7 * 24 * 3600
+
+
+def sha256(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def analysis_key(content, role, mode):
+    return f"{sha256(content)}:{sha256(role)}:{mode}"
+
+
+class Cache:
+    """Clave/valor JSON con TTL, desalojo LRU por tamaño y contadores de hits/misses."""
+
+    def __init__(self, path, max_bytes=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or int(CACHE_MAX_MB * 1024 * 1024)
+        self.hits, self.misses = Counter(), Counter()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+
+    def get(self, namespace, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                if row is not None:
+                    self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self.misses[namespace] += 1
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, key))
+            self.hits[namespace] += 1
+        return json.loads(row[0])
+
+    def set(self, namespace, key, value, ttl=None):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now + ttl if ttl else None, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 🧹 LRU: borra las entradas menos usadas hasta volver al límite
+        excess = total - self.max_bytes
+        for namespace, key, size in self._db.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            excess -= size
+            if excess <= 0:
+                break
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": sum(self.hits.values()), "misses": sum(self.misses.values()),
+                "by_namespace": {ns: {"hits": self.hits[ns], "misses": self.misses[ns]}
+                                 for ns in sorted(set(self.hits) | set(self.misses))},
+                "entries": entries, "bytes": size}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+        self.hits.clear()
+        self.misses.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Caché compartida por todo el proceso (sobrevive a los reruns de Streamlit)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = Cache(CACHE_DIR / "cache.sqlite3")
+    return _cache
@@ -0,0 +1,167 @@
+"""Compactación de CVs por presupuesto de tokens: normaliza, limpia y prioriza secciones."""
+import os
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# ⚙️ Presupuestos (tokens del modelo, sobrescribibles por variables de entorno)
+CV_TOKEN_BUDGET = int(os.getenv("HR_CV_TOKENS", 600))
+OPTIMIZE_TOKEN_BUDGET = int(os.getenv("HR_OPTIMIZE_TOKENS", 1500))
+SHARD_TOKEN_BUDGET = int(os.getenv("HR_SHARD_TOKENS", 12000))
+MODEL = "gpt-4o"
+
+# Secciones por prioridad (menor = más valiosa) y sus títulos en español/inglés
+SECTIONS = [
+    ("experiencia", 1, r"experiencia(?: laboral| profesional)?|historial laboral|trayectoria|(?:work |professional )?experience|employment"),
+    ("habilidades", 2, r"habilidades|competencias|conocimientos|tecnolog[ií]as|herramientas|skills|technical skills"),
+    ("educacion", 3, r"educaci[oó]n|formaci[oó]n(?: acad[eé]mica)?|estudios|education"),
+    ("perfil", 4, r"perfil(?: profesional)?|resumen|sobre m[ií]|objetivo|summary|profile|about me"),
+    ("certificaciones", 5, r"certificaciones|certificados|cursos|certifications|courses"),
+    ("idiomas", 6, r"idiomas|languages"),
+    ("proyectos", 6, r"proyectos|projects"),
+    ("contacto", 8, r"datos personales|informaci[oó]n personal|contacto|contact"),
+    ("intereses", 9, r"intereses|hobbies|pasatiempos|interests"),
+    ("referencias", 9, r"referencias(?: personales| laborales)?|references"),
+]
+HEADER_PRIORITY = 0  # nombre y cargo al inicio del CV
+OTHER_PRIORITY = 7
+CORE_PRIORITY = 3  # encabezado, experiencia, habilidades y educación se llenan antes que el resto
+EDGE_LINES = 3  # líneas al inicio y al final de cada página donde se buscan encabezados/pies
+
+_HEADING = re.compile(
+    r"^\s*(?:" + "|".join(f"(?P<{name}>{pattern})" for name, _, pattern in SECTIONS) + r")\s*:?\s*$",
+    re.IGNORECASE)
+_PRIORITY = {name: priority for name, priority, _ in SECTIONS}
+
+BOILERPLATE = re.compile(
+    r"^(?:curr[ií]cul(?:um|o)(?: vitae)?|hoja de vida|cv|resume|"
+    r"p[aá]gina \d+(?: de \d+)?|page \d+(?: of \d+)?|\d+\s*/\s*\d+|"
+    r"referencias disponibles.*|references available.*|"
+    r".*(?:autorizo el tratamiento|tratamiento de (?:mis )?datos personales|ley 1581|gdpr).*)$",
+    re.IGNORECASE)
+
+
+# 🔢 Tokenizador real (tiktoken); estimación por caracteres si no está instalado
+@lru_cache(maxsize=None)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, budget):
+    encoding = _encoding()
+    if encoding is None:
+        return text[:budget * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= budget else encoding.decode(tokens[:budget])
+
+
+@dataclass
+class Compaction:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    sections: list = field(default_factory=list)
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+
+# 🧹 Normalización
+def normalize(text):
+    """Unifica unicode y espacios, y elimina encabezados/pies repetidos y boilerplate.
+
+    Las páginas llegan separadas por "\f" (ver `extract_pdf_text`); solo se
+    consideran encabezado o pie las líneas que se repiten en la misma posición
+    del borde de varias páginas, así un cargo repetido en la experiencia no se pierde.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\u00ad", "")
+    pages = [[re.sub(r"[ \t ]+", " ", line).strip() for line in page.splitlines()] for page in text.split("\f")]
+    edges = [_edges(page) for page in pages]
+    # Misma línea corta en la misma posición del borde de varias páginas = encabezado/pie
+    # (nombre, teléfono, numeración)
+    repeated = {edge for edge, n in Counter(e for page in edges for e in set(page.values())).items() if n > 1}
+    seen, kept = set(), []
+    for page, edge in zip(pages, edges):
+        for i, line in enumerate(page):
+            key = line.lower()
+            if line and BOILERPLATE.match(line):
+                continue
+            if edge.get(i) in repeated and key in seen and not _HEADING.match(line):
+                continue
+            seen.add(key)
+            kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _edges(lines, depth=EDGE_LINES):
+    """{índice: (posición desde el borde, línea en minúsculas)} de las primeras y últimas
+    líneas cortas no vacías de una página (posiciones negativas = desde el final)."""
+    filled = [i for i, line in enumerate(lines) if line]
+    edges = {i: (-n - 1, lines[i].lower()) for n, i in enumerate(reversed(filled[-depth:]))}
+    edges.update({i: (n, lines[i].lower()) for n, i in enumerate(filled[:depth])})
+    return {i: edge for i, edge in edges.items() if len(lines[i]) <= 80}
+
+
+def split_sections(text):
+    """Divide el CV en [(sección, prioridad, texto)] según los títulos reconocidos."""
+    sections = [["encabezado", HEADER_PRIORITY, []]]
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            name = match.lastgroup
+            sections.append([name, _PRIORITY[name], [line]])
+        else:
+            sections[-1][2].append(line)
+    return [(name, priority, "\n".join(lines).strip()) for name, priority, lines in sections if "".join(lines).strip()]
+
+
+def compact_cv(text, budget=None):
+    """Normaliza el CV y conserva las secciones más valiosas hasta `budget` tokens."""
+    budget = budget or CV_TOKEN_BUDGET
+    tokens_before = count_tokens(text)
+    sections = split_sections(normalize(text))
+
+    # Secciones clave: 1ª pasada con tope de medio presupuesto (la experiencia no desplaza a
+    # habilidades y educación), 2ª hasta completarlas; solo entonces entra el resto por prioridad
+    costs = [count_tokens(body) + 1 for _, _, body in sections]
+    order = sorted(range(len(sections)), key=lambda i: (sections[i][1], i))
+    core = [i for i in order if sections[i][1] <= CORE_PRIORITY]
+    rest = [i for i in order if sections[i][1] > CORE_PRIORITY]
+    remaining, allotted = budget, {}
+    for indexes, cap in ((core, budget // 2), (core, budget), (rest, budget)):
+        for index in indexes:
+            extra = min(costs[index], cap) - allotted.get(index, 0)
+            if extra <= 0 or index not in allotted and extra > remaining <= 20:
+                continue
+            extra = min(extra, remaining)
+            allotted[index] = allotted.get(index, 0) + extra
+            remaining -= extra
+
+    chosen = {index: sections[index][2] if tokens >= costs[index] else truncate_tokens(sections[index][2], tokens - 1)
+              for index, tokens in allotted.items() if tokens > 1}
+    compacted = "\n".join(chosen[i] for i in sorted(chosen))
+    return Compaction(compacted, tokens_before, count_tokens(compacted),
+                      [sections[i][0] for i in sorted(chosen)])
+
+
+def compact_cvs(cvs_data, budget=None):
+    """Compacta una lista de CVs; devuelve (textos, reportes por CV)."""
+    reports = [compact_cv(cv, budget) for cv in cvs_data]
+    return [report.text for report in reports], reports
@@ -0,0 +1,171 @@
+"""Extracción de texto de CVs en PDF: ZIP leído desde memoria y parsing en paralelo."""
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+
+from hr_agent.cache import PDF_TTL, get_cache, sha256
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+MAX_WORKERS = int(os.getenv("HR_PDF_WORKERS", min(8, os.cpu_count() or 1)))
+PDF_TIMEOUT = float(os.getenv("HR_PDF_TIMEOUT", 30))
+MIN_TEXT_CHARS = 50
+PDF_KIND = "pdf_pages"  # clave de caché del texto extraído; cambia si cambia el formato
+
+
+def extract_pdf_text(pdf_content):
+    try:
+        # "\f" entre páginas: compaction.normalize reconoce así encabezados y pies de página
+        return "\f".join([page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(pdf_content)).pages])
+    except:
+        return ""
+
+
+def cached_pdf_text(pdf_content):
+    """extract_pdf_text con caché por SHA-256 de los bytes del PDF."""
+    cache, key = get_cache(), sha256(pdf_content)
+    text = cache.get(PDF_KIND, key)
+    if text is None:
+        text = extract_pdf_text(pdf_content)
+        cache.set(PDF_KIND, key, text, ttl=PDF_TTL)
+    return text
+
+
+def _pdf_members(zip_ref):
+    return [info for info in zip_ref.infolist()
+            if info.filename.lower().endswith('.pdf') and not info.is_dir()]
+
+
+def _kill_pool(pool):
+    """Cierra el pool sin esperar y termina los procesos colgados (PDF malformados)."""
+    processes = list(getattr(pool, "_processes", {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for proc in processes:
+        if proc.is_alive():
+            proc.terminate()
+
+
+def iter_zip_texts(zip_file, max_workers=None, timeout=None, use_cache=True):
+    """Genera (archivo, texto) a medida que cada PDF del ZIP termina de procesarse.
+
+    El ZIP se lee directo del buffer subido (sin archivo temporal). Como mucho
+    `max_workers` PDFs están en vuelo a la vez; los que superan `timeout`
+    segundos se descartan y el pool se recrea para liberar el worker colgado.
+    Si un worker muere (OOM, segfault), lo que estaba en vuelo sale vacío y
+    el pool también se recrea.
+    Los PDFs ya vistos (mismo SHA-256) salen de la caché sin reparsearse.
+    """
+    cache = get_cache() if use_cache else None
+    max_workers = max_workers or MAX_WORKERS
+    timeout = timeout or PDF_TIMEOUT
+    zip_file.seek(0)
+
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        pending = _pdf_members(zip_ref)
+        pending.reverse()  # pop() desde el final conserva el orden del archivo
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        in_flight = {}  # future -> (archivo, bytes, inicio)
+
+        def restart():
+            nonlocal pool
+            _kill_pool(pool)
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+
+        def submit(name, data):
+            try:
+                future = pool.submit(extract_pdf_text, data)
+            except BrokenProcessPool:
+                restart()
+                future = pool.submit(extract_pdf_text, data)
+            in_flight[future] = (name, data, time.monotonic())
+
+        def lookup(data):
+            return cache.get(PDF_KIND, sha256(data)) if cache else None
+
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < max_workers:
+                    info = pending.pop()
+                    try:
+                        data = zip_ref.read(info)
+                    except (zipfile.BadZipFile, NotImplementedError, RuntimeError, OSError):
+                        yield info.filename, ""  # ilegible (CRC, cifrado...): cuenta para el progreso
+                        continue
+                    text = lookup(data)
+                    if text is not None:
+                        yield info.filename, text
+                    else:
+                        submit(info.filename, data)
+                if not in_flight:
+                    continue
+
+                oldest = min(started for _, _, started in in_flight.values())
+                wait_for = max(0.0, oldest + timeout - time.monotonic())
+                done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                broken = False
+                for future in done:
+                    name, data, _ = in_flight.pop(future)
+                    try:
+                        text = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        yield name, ""
+                        continue
+                    except Exception:
+                        yield name, ""
+                        continue
+                    if cache:
+                        cache.set(PDF_KIND, sha256(data), text, ttl=PDF_TTL)
+                    yield name, text
+
+                if broken:
+                    # 💥 Un worker murió: no se sabe qué PDF lo tumbó, así que todo lo que estaba en vuelo se descarta
+                    for name, _, _ in in_flight.values():
+                        yield name, ""
+                    in_flight.clear()
+                    restart()
+                    continue
+
+                now = time.monotonic()
+                expired = [f for f, (_, _, started) in in_flight.items() if now - started >= timeout]
+                if expired:
+                    # ⏱️ Un PDF colgado bloquea su worker: se descarta y se reinicia el pool
+                    for future in expired:
+                        name, _, _ = in_flight.pop(future)
+                        yield name, ""
+                    survivors = [(name, data) for name, data, _ in in_flight.values()]
+                    in_flight.clear()
+                    restart()
+                    for name, data in survivors:
+                        submit(name, data)
+        finally:
+            if in_flight:
+                _kill_pool(pool)
+            else:
+                pool.shutdown()
+
+
+def process_zip(zip_file, max_workers=None, timeout=None, on_progress=None, use_cache=True):
+    """Extrae los CVs válidos del ZIP y devuelve (textos, nombres) en el orden del archivo.
+
+    Los textos salen completos; el recorte por presupuesto de tokens lo hace
+    `hr_agent.compaction.compact_cvs`.
+    """
+    zip_file.seek(0)
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        order = {info.filename: i for i, info in enumerate(_pdf_members(zip_ref))}
+
+    results = []
+    for done, (name, text) in enumerate(iter_zip_texts(zip_file, max_workers, timeout, use_cache), start=1):
+        if len(text.strip()) > MIN_TEXT_CHARS:
+            results.append((order[name], text, name))
+        if on_progress:
+            on_progress(done, len(order))
+
+    results.sort()
+    return [text for _, text, _ in results], [name for _, _, name in results]
@@ -0,0 +1,252 @@
+"""Histórico columnar de resultados de screening y contexto compacto para el chat.
+
+Cada ejecución se guarda en su propio Parquet (columnas tipadas: puntaje,
+años, skills como lista) con un manifiesto aparte, así que el historial
+sobrevive a la sesión de Streamlit y solo se leen las columnas que se usan.
+Si pyarrow no está instalado se usa pickle de pandas con el mismo esquema.
+"""
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from hr_agent.cache import CACHE_DIR
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+RESULTS_DIR = Path(os.getenv("HR_RESULTS_DIR", CACHE_DIR / "results"))
+CHAT_MAX_ROWS = int(os.getenv("HR_CHAT_MAX_ROWS", 15))
+RESULTS_HISTORY = int(os.getenv("HR_RESULTS_HISTORY", 50))
+
+COLUMNS = {
+    "archivo": "string",
+    "nombre": "string",
+    "puntaje": "float32",
+    "experiencia_anos": "Int16",
+    "skills": "object",  # lista de strings
+    "educacion": "string",
+    "recomendacion": "string",
+    "similitud": "float32",
+}
+
+try:
+    import pyarrow  # noqa: F401
+
+    FORMAT = "parquet"
+except ImportError:
+    FORMAT = "pkl"
+
+
+def to_frame(candidatos):
+    """DataFrame con el esquema tipado, a partir de los registros del modelo."""
+    df = pd.DataFrame(candidatos).reindex(columns=list(COLUMNS))
+    df["skills"] = df["skills"].map(lambda s: list(s) if isinstance(s, (list, tuple)) else [])
+    for column in ("puntaje", "experiencia_anos", "similitud"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["experiencia_anos"] = df["experiencia_anos"].round()
+    return df.astype(COLUMNS)
+
+
+# 🗂️ Almacén
+class ResultsStore:
+    """Un fichero por ejecución más un manifiesto JSON; lecturas por columnas con LRU en memoria."""
+
+    def __init__(self, root, max_cached=8):
+        self.root = Path(root)
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()  # (run_id, columnas) -> DataFrame
+
+    @property
+    def _manifest(self):
+        return self.root / "runs.json"
+
+    def _path(self, run_id):
+        return self.root / f"run-{run_id}.{FORMAT}"
+
+    def save(self, run_id, candidatos, **meta):
+        """Guarda una ejecución (idempotente por `run_id`) y devuelve su DataFrame tipado."""
+        df = to_frame(candidatos)
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(run_id).with_suffix(".tmp")
+            if FORMAT == "parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_pickle(tmp)
+            os.replace(tmp, self._path(run_id))
+
+            runs = [r for r in self._read_manifest() if r["run_id"] != run_id]
+            runs.insert(0, {"run_id": run_id, "created_at": time.time(), "candidatos": len(df), **meta})
+            for stale in runs[RESULTS_HISTORY:]:
+                self._path(stale["run_id"]).unlink(missing_ok=True)
+            self._write_manifest(runs[:RESULTS_HISTORY])
+            self._frames = OrderedDict((k, v) for k, v in self._frames.items() if k[0] != run_id)
+        return df
+
+    def _read_manifest(self):
+        try:
+            return json.loads(self._manifest.read_text())
+        except (OSError, ValueError):
+            return []
+
+    def _write_manifest(self, runs):
+        tmp = self._manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps(runs, ensure_ascii=False))
+        os.replace(tmp, self._manifest)
+
+    def runs(self):
+        """Historial de ejecuciones, la más reciente primero."""
+        with self._lock:
+            return [r for r in self._read_manifest() if self._path(r["run_id"]).exists()]
+
+    def load(self, run_id, columns=None):
+        """DataFrame de una ejecución; con `columns` solo se leen esas del disco."""
+        key = (run_id, tuple(columns) if columns else None)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key]
+        path = self._path(run_id)
+        if FORMAT == "parquet":
+            df = pd.read_parquet(path, columns=list(columns) if columns else None)
+        else:
+            df = pd.read_pickle(path)
+            df = df[list(columns)] if columns else df
+        with self._lock:
+            self._frames[key] = df
+            while len(self._frames) > self.max_cached:
+                self._frames.popitem(last=False)
+        return df
+
+    def top(self, run_id, n=1, by="puntaje", columns=None):
+        """Los `n` mejores sin ordenar la tabla entera."""
+        df = self.load(run_id, columns)
+        return df.nlargest(n, by) if by in df.columns else df.head(n)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore(RESULTS_DIR)
+    return _store
+
+
+# 🔎 Consultas
+def _fold(text):
+    return unicodedata.normalize("NFKD", str(text).lower()).encode("ascii", "ignore").decode()
+
+
+def skill_mask(df, wanted):
+    """Filas que tienen alguna de las skills pedidas (comparación sin mayúsculas ni tildes)."""
+    exploded = df["skills"].explode().dropna().map(_fold)
+    hits = exploded[exploded.isin({_fold(s) for s in wanted})]
+    return df.index.isin(hits.index.unique())
+
+
+def _at_least(series, bound):
+    """`bound` es (">", n) para "más de n" o (">=", n) para "al menos n"."""
+    op, value = bound
+    return series > value if op == ">" else series >= value
+
+
+def query(df, skills=None, score=None, years=None, names=None, sort="puntaje", limit=None):
+    """Filtra, ordena y recorta; los filtros son máscaras vectorizadas de pandas.
+
+    `score` y `years` son cotas inferiores (">" o ">=", valor).
+    """
+    mask = pd.Series(True, index=df.index)
+    if skills:
+        mask &= skill_mask(df, skills)
+    if score is not None:
+        mask &= _at_least(df["puntaje"], score)
+    if years is not None:
+        mask &= _at_least(df["experiencia_anos"].fillna(0), years)
+    if names:
+        mask &= df["nombre"].map(_fold).isin({_fold(n) for n in names})
+    result = df[mask]
+    if limit:
+        return result.nlargest(limit, sort) if sort in result.columns else result.head(limit)
+    return result.sort_values(sort, ascending=False) if sort in result.columns else result
+
+
+def summary(df):
+    """Agregados de toda la ejecución en pocas líneas."""
+    if df.empty:
+        return "0 candidatos"
+    skills = df["skills"].explode().dropna().value_counts().head(8)
+    years = df["experiencia_anos"].dropna()
+    lines = [f"{len(df)} candidatos · puntaje medio {df['puntaje'].mean():.1f} · mediana {df['puntaje'].median():.1f}"
+             f" · máximo {df['puntaje'].max():.0f}"]
+    if not years.empty:
+        lines.append(f"Experiencia: media {years.mean():.1f} años, rango {years.min()}-{years.max()}")
+    if not skills.empty:
+        lines.append("Skills más comunes: " + ", ".join(f"{skill} ({n})" for skill, n in skills.items()))
+    return "\n".join(lines)
+
+
+# 💬 Contexto para el chat
+_COLUMN_HINTS = {
+    "experiencia_anos": ("experiencia", "anos", "senior", "junior", "trayectoria"),
+    "skills": ("skill", "habilidad", "tecnolog", "sabe", "conoce", "domina", "stack"),
+    "educacion": ("educacion", "estudio", "titulo", "universidad", "carrera", "formacion"),
+    "recomendacion": ("por que", "recomend", "eligio", "motivo", "razon", "fortaleza", "debilidad"),
+    "similitud": ("similitud", "afin", "preselec"),
+}
+_TOP_N = re.compile(r"\b(?:top|mejores|primeros)\s+(\d+)\b")
+_MIN_YEARS = re.compile(r"(mas de|mayor (?:a|que)|al menos|minimo|>=?)\s*(\d+)\s*anos")
+_MIN_SCORE = re.compile(r"(?:puntaje|score|nota)\s*(?:de\s*)?(mas de|mayor (?:a|que)|al menos|minimo|>=?|sobre)\s*(\d+)")
+
+
+def _bound(match):
+    """"más de", "mayor a/que", "sobre" y ">" son estrictos; "al menos", "mínimo" y ">=" no."""
+    if not match:
+        return None
+    phrase, value = match.group(1), int(match.group(2))
+    return (">=" if phrase in ("al menos", "minimo", ">=") else ">", value)
+
+
+def plan(question, df):
+    """Columnas y filtros relevantes para la pregunta, por palabras clave."""
+    text = _fold(question)
+    columns = ["nombre", "puntaje"] + [col for col, hints in _COLUMN_HINTS.items()
+                                       if any(hint in text for hint in hints)]
+    vocabulary = set(df["skills"].explode().dropna().map(_fold))
+    skills = sorted(skill for skill in vocabulary if skill and re.search(rf"(?<!\w){re.escape(skill)}(?!\w)", text))
+    words = set(re.findall(r"\w+", text))
+    names = [name for name in df["nombre"].dropna().unique()
+             if (parts := re.findall(r"\w+", _fold(name))[:2]) and words.issuperset(parts)]
+    if skills and "skills" not in columns:
+        columns.append("skills")
+    top = _TOP_N.search(text)
+    years = _bound(_MIN_YEARS.search(text))
+    if years and "experiencia_anos" not in columns:
+        columns.append("experiencia_anos")
+    return {"columns": columns, "skills": skills, "names": names,
+            "years": years, "score": _bound(_MIN_SCORE.search(text)),
+            "limit": min(int(top.group(1)), CHAT_MAX_ROWS) if top else CHAT_MAX_ROWS}
+
+
+def chat_context(question, df):
+    """Resumen agregado más solo las filas y columnas que la pregunta necesita, en CSV."""
+    spec = plan(question, df)
+    rows = query(df, skills=spec["skills"], score=spec["score"], years=spec["years"],
+                 names=spec["names"], limit=spec["limit"])
+    table = rows[spec["columns"]].copy()
+    if "skills" in table.columns:
+        table["skills"] = table["skills"].map(", ".join)
+    filters = [f"{k}={v}" for k, v in spec.items() if k in ("skills", "names") and v]
+    filters += [f"{label}{spec[k][0]}{spec[k][1]}" for k, label in (("years", "años"), ("score", "puntaje")) if spec[k]]
+    filters = ", ".join(filters)
+    header = f"Mostrando {len(table)} de {len(df)} candidatos" + (f" (filtro: {filters})" if filters else " (mejor puntaje)")
+    return f"{summary(df)}\n\n{header}:\n{table.to_csv(index=False)}"
@@ -0,0 +1,215 @@
+"""Preselección local de CVs: embeddings (o TF-IDF con hashing) e índice NumPy persistente.
+
+Entre `process_zip` y el LLM: solo los `top_k` CVs más parecidos al cargo se
+puntúan en detalle. Usa sentence-transformers si está instalado; si no, un
+TF-IDF con feature hashing que no necesita vocabulario ni dependencias extra.
+"""
+import logging
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from hr_agent.cache import CACHE_DIR, sha256
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+SHORTLIST_K = int(os.getenv("HR_SHORTLIST_K", 50))
+EMBED_MODEL = os.getenv("HR_EMBED_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")  # "tfidf" fuerza el fallback
+INDEX_MAX_MB = float(os.getenv("HR_INDEX_MAX_MB", 64))
+HASH_DIM = 2 ** 12
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+
+# 🔢 Vectorizadores
+class HashingTfidf:
+    """Frecuencias de términos (palabras y bigramas) en HASH_DIM cubetas; el IDF se calcula por lote."""
+
+    name = "tfidf"
+    idf_weighted = True
+
+    def tokens(self, text):
+        text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+        words = _WORD.findall(text)
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets = [zlib.crc32(token.encode()) % HASH_DIM for token in self.tokens(text)]
+            np.add.at(vectors[row], buckets, 1.0)
+        # tf sublineal: una palabra repetida 20 veces no vale 20 veces más
+        return np.log1p(vectors, out=vectors)
+
+
+class SentenceEmbedder:
+    idf_weighted = False
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{re.sub(r'[^a-zA-Z0-9]+', '-', model_name)}"
+
+    def encode(self, texts):
+        return self.model.encode(list(texts), batch_size=32, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Modelo local si está disponible; TF-IDF con hashing en caso contrario."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = HashingTfidf()
+            if EMBED_MODEL != "tfidf":
+                try:
+                    _embedder = SentenceEmbedder(EMBED_MODEL)
+                except ImportError:
+                    pass
+                except Exception as e:
+                    logger.warning("No se pudo cargar %s, se usa TF-IDF: %s", EMBED_MODEL, e)
+    return _embedder
+
+
+# 💾 Índice persistente
+class VectorIndex:
+    """Vectores por hash de CV en un .npz junto a la caché; se reescribe de forma atómica.
+
+    Acotado a `max_bytes` de vectores: al pasarse se descartan los menos usados
+    recientemente (LRU), como la caché SQLite con HR_CACHE_MAX_MB.
+    """
+
+    def __init__(self, path, max_bytes=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes or int(INDEX_MAX_MB * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._vectors = None
+        self._used = np.zeros(0, dtype=np.int64)  # último uso de cada fila (reloj lógico)
+        self._clock = 0
+        if self.path.exists():
+            try:
+                with np.load(self.path) as data:
+                    self._vectors = data["vectors"]
+                    self._rows = {key: i for i, key in enumerate(data["keys"].tolist())}
+                    self._used = data["used"] if "used" in data.files else np.zeros(len(self._rows), dtype=np.int64)
+                    self._clock = int(self._used.max(initial=0))
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("Índice de vectores ilegible, se reconstruye: %s", e)
+                self._vectors, self._rows, self._used = None, {}, np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def lookup(self, keys):
+        """Devuelve (matriz con ceros donde falte, posiciones que faltan)."""
+        with self._lock:
+            found = [self._rows.get(key) for key in keys]
+            missing = [i for i, row in enumerate(found) if row is None]
+            if self._vectors is None:
+                return None, missing
+            matrix = np.zeros((len(keys), self._vectors.shape[1]), dtype=np.float32)
+            present = [i for i, row in enumerate(found) if row is not None]
+            if present:
+                rows = [found[i] for i in present]
+                matrix[present] = self._vectors[rows]
+                self._clock += 1
+                self._used[rows] = self._clock
+            return matrix, missing
+
+    def add(self, keys, vectors):
+        with self._lock:
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            if not new:
+                return
+            block = np.stack([vector for _, vector in new]).astype(np.float32)
+            start = 0 if self._vectors is None else len(self._vectors)
+            self._vectors = block if self._vectors is None else np.concatenate([self._vectors, block])
+            self._clock += 1
+            self._used = np.concatenate([self._used, np.full(len(new), self._clock, dtype=np.int64)])
+            for offset, (key, _) in enumerate(new):
+                self._rows[key] = start + offset
+            self._evict()
+            self._save()
+
+    def _evict(self):
+        """Conserva las filas usadas más recientemente que caben en `max_bytes`."""
+        row_bytes = self._vectors.shape[1] * self._vectors.itemsize
+        capacity = max(1, self.max_bytes // row_bytes)
+        if len(self._vectors) <= capacity:
+            return
+        keep = np.sort(np.argsort(-self._used, kind="stable")[:capacity])
+        keys = sorted(self._rows, key=self._rows.get)
+        self._vectors, self._used = self._vectors[keep], self._used[keep]
+        self._rows = {keys[row]: i for i, row in enumerate(keep)}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = np.array(sorted(self._rows, key=self._rows.get))
+        tmp = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp, keys=keys, vectors=self._vectors, used=self._used)
+        os.replace(tmp, self.path)
+
+
+_indexes = {}
+
+
+def get_index(embedder):
+    with _embedder_lock:
+        if embedder.name not in _indexes:
+            _indexes[embedder.name] = VectorIndex(CACHE_DIR / f"vectors-{embedder.name}.npz")
+    return _indexes[embedder.name]
+
+
+# 🎯 Preselección
+def embed_cvs(cvs_data, embedder=None):
+    """Vectores de los CVs, reutilizando los ya indexados (clave = hash del texto)."""
+    embedder = embedder or get_embedder()
+    index = get_index(embedder)
+    keys = [sha256(cv) for cv in cvs_data]
+    matrix, missing = index.lookup(keys)
+    if missing:
+        fresh = embedder.encode([cvs_data[i] for i in missing])
+        if matrix is None:
+            matrix = np.zeros((len(keys), fresh.shape[1]), dtype=np.float32)
+        matrix[missing] = fresh
+        index.add([keys[i] for i in missing], fresh)
+    return matrix
+
+
+def similarities(cvs_data, query, embedder=None):
+    """Similitud coseno de cada CV con la consulta, en una sola multiplicación matricial."""
+    embedder = embedder or get_embedder()
+    docs = embed_cvs(cvs_data, embedder)
+    query_vector = embedder.encode([query])[0]
+    if embedder.idf_weighted:
+        df = np.count_nonzero(docs, axis=0)
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1
+        docs = docs * idf
+        query_vector = query_vector * idf
+    norms = np.linalg.norm(docs, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+    return (docs @ query_vector) / np.where(norms == 0, 1.0, norms)
+
+
+def shortlist(cvs_data, names, query, top_k=None, embedder=None):
+    """Devuelve (cvs, nombres, similitudes) de los `top_k` CVs más afines, de mayor a menor."""
+    top_k = SHORTLIST_K if top_k is None else top_k
+    scores = similarities(cvs_data, query, embedder)
+    if top_k <= 0 or top_k >= len(cvs_data):
+        order = np.argsort(-scores)
+    else:
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        order = best[np.argsort(-scores[best])]
+    return ([cvs_data[i] for i in order], [names[i] for i in order],
+            [round(float(scores[i]), 4) for i in order])
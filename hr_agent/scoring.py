@@ -0,0 +1,197 @@
+"""Puntuación masiva de CVs por lotes (shards) concurrentes."""
+import asyncio
+import json
+import logging
+import os
+import posixpath
+
+import openai
+import pandas as pd
+
+from common.telemetry import annotate
+from hr_agent.cache import ANALYSIS_TTL, analysis_key, get_cache
+from hr_agent.compaction import SHARD_TOKEN_BUDGET, count_tokens
+from hr_agent.structured import CandidateStream, clean_candidate, salvage_candidates
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+SHARD_SIZE = int(os.getenv("HR_SHARD_SIZE", 8))
+MAX_CONCURRENCY = int(os.getenv("HR_SCORING_CONCURRENCY", 4))
+MAX_RETRIES = int(os.getenv("HR_SCORING_RETRIES", 2))
+
+logger = logging.getLogger(__name__)
+
+
+def retryable(error):
+    """Los 4xx de la API (clave inválida, petición mal formada...) no mejoran reintentando."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return True
+
+
+def describe(error):
+    return f"{type(error).__name__}: {error}"[:300]
+
+
+def build_content(cvs_data, names):
+    return "\n---\n".join([f"{n}: {cv}" for cv, n in zip(cvs_data, names)])
+
+
+def parse_candidates(result_text):
+    """Extrae la lista `candidatos` del JSON devuelto por el modelo (o el array suelto).
+
+    Si el JSON está truncado o mal formado se rescatan los objetos completos;
+    ValueError solo si no queda ninguno.
+    """
+    text = result_text
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+
+    try:
+        results = json.loads(text)
+    except json.JSONDecodeError as e:
+        salvaged = salvage_candidates(result_text)
+        if not salvaged:
+            raise ValueError(f"JSON inválido: {e}") from e
+        return salvaged
+    if isinstance(results, dict):
+        results = results.get("candidatos")
+    if not isinstance(results, list):  # un array suelto también vale: el modelo a veces omite el objeto
+        raise ValueError("Respuesta sin lista 'candidatos'")
+    return [c for c in map(clean_candidate, results) if c is not None]
+
+
+def match_file(archivo, names):
+    """Nombre del shard al que se refiere el modelo (acepta el nombre sin carpeta)."""
+    if not isinstance(archivo, str):
+        return None
+    if archivo in names:
+        return archivo
+    base = posixpath.basename(archivo.strip())
+    return next((name for name in names if posixpath.basename(name) == base), None)
+
+
+def shard(cvs_data, names, size=None, max_tokens=None):
+    """Agrupa CVs en shards de como mucho `size` CVs y `max_tokens` tokens de prompt."""
+    size = size or SHARD_SIZE
+    max_tokens = max_tokens or SHARD_TOKEN_BUDGET
+    shards, cvs, shard_names, tokens = [], [], [], 0
+    for cv, name in zip(cvs_data, names):
+        cost = count_tokens(f"{name}: {cv}\n---\n")
+        if cvs and (len(cvs) >= size or tokens + cost > max_tokens):
+            shards.append((cvs, shard_names))
+            cvs, shard_names, tokens = [], [], 0
+        cvs.append(cv)
+        shard_names.append(name)
+        tokens += cost
+    if cvs:
+        shards.append((cvs, shard_names))
+    return shards
+
+
+def rank_candidates(candidatos):
+    """Une los candidatos de todos los shards en un DataFrame ordenado por puntaje."""
+    df = pd.DataFrame(candidatos)
+    if df.empty:
+        return df
+    if "puntaje" in df.columns:
+        df["puntaje"] = pd.to_numeric(df["puntaje"], errors="coerce")
+        df = df.sort_values("puntaje", ascending=False, na_position="last")
+    return df.reset_index(drop=True)
+
+
+async def score_batch(cvs_data, names, score_fn, shard_size=None, concurrency=None,
+                      retries=None, on_progress=None, cache_scope=None, on_candidates=None):
+    """Puntúa los CVs en shards concurrentes y vuelve a pedir solo los archivos que faltan.
+
+    `score_fn(content, on_content)` es una corrutina que devuelve el texto JSON
+    del modelo para un shard; `on_content(texto_acumulado)` permite leer cada
+    candidato en cuanto llega. De una respuesta truncada o mal formada se
+    conservan los candidatos completos y solo los archivos sin puntuar pasan a
+    la siguiente ronda. Con `cache_scope=(cargo, modo)` cada candidato se guarda
+    en caché por hash de su CV, así que solo se envían al modelo los CVs nuevos.
+    `on_candidates(candidatos)` recibe cada grupo de filas a medida que se puntúa.
+    Un error no reintentable (autenticación, petición inválida) corta los reintentos.
+    Devuelve (DataFrame ordenado, archivos sin puntuar, {archivo: último error}).
+    """
+    retries = MAX_RETRIES if retries is None else retries
+    semaphore = asyncio.Semaphore(concurrency or MAX_CONCURRENCY)
+    cache = get_cache() if cache_scope else None
+    keys = {name: analysis_key(cv, *cache_scope) for cv, name in zip(cvs_data, names)} if cache else {}
+    texts = dict(zip(names, cvs_data))
+
+    merged, todo_names = [], []
+    for name in names:
+        candidato = cache.get("candidate", keys[name]) if cache else None
+        if candidato is not None:
+            merged.append({**candidato, "archivo": name})
+        else:
+            todo_names.append(name)
+
+    annotate(candidates_cached=len(merged))
+    if merged and on_candidates:
+        on_candidates(merged)
+    done = total = 0
+    errors, fatal = {}, None
+
+    async def score_shard(shard_names):
+        """Devuelve los candidatos puntuados del shard (posiblemente parciales)."""
+        nonlocal done, fatal
+        stream, emitted = CandidateStream(), {}
+
+        def assign(candidato, position=None):
+            archivo = match_file(candidato.get("archivo"), shard_names)
+            if archivo is None and position is not None:
+                archivo = shard_names[position]
+            if archivo is None or archivo in emitted:
+                return None
+            emitted[archivo] = {**candidato, "archivo": archivo}
+            return emitted[archivo]
+
+        def on_content(text):
+            # Filas en vivo: cada objeto cerrado del array se publica sin esperar al resto
+            rows = [row for row in map(assign, stream.feed(text)) if row]
+            if rows and on_candidates:
+                on_candidates(rows)
+
+        content = build_content([texts[n] for n in shard_names], shard_names)
+        async with semaphore:
+            try:
+                candidatos = parse_candidates(await score_fn(content, on_content))
+            except Exception as e:
+                logger.warning("Shard de %d CVs sin puntuar del todo: %s", len(shard_names), describe(e))
+                for name in shard_names:
+                    errors[name] = describe(e)
+                if not retryable(e):
+                    fatal = e
+                candidatos = stream.records
+        # Si el modelo omite el archivo en una respuesta completa, se asigna por posición
+        complete = len(candidatos) == len(shard_names)
+        late = [row for row in (assign(c, i if complete else None) for i, c in enumerate(candidatos)) if row]
+        if late and on_candidates:
+            on_candidates(late)
+
+        done += 1
+        if on_progress:
+            on_progress(done, total)
+        if cache:
+            for archivo, candidato in emitted.items():
+                cache.set("candidate", keys[archivo], candidato, ttl=ANALYSIS_TTL)
+        return list(emitted.values())
+
+    missing = todo_names
+    for _ in range(retries + 1):
+        pending = shard([texts[n] for n in missing], missing, shard_size)
+        total += len(pending)
+        outcomes = await asyncio.gather(*[score_shard(shard_names) for _, shard_names in pending])
+        scored = set()
+        for outcome in outcomes:
+            merged.extend(outcome)
+            scored.update(c["archivo"] for c in outcome)
+        # Solo los archivos sin fila vuelven a pedirse, no el shard entero
+        missing = [name for name in missing if name not in scored]
+        if not missing or fatal is not None:
+            break
+
+    return rank_candidates(merged), missing, {name: errors[name] for name in missing if name in errors}
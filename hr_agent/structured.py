@@ -0,0 +1,114 @@
+"""Salida estructurada del modo batch: esquema Pydantic y parser incremental del array `candidatos`."""
+import json
+import re
+
+from agno.utils.models.schema_utils import get_response_schema_for_provider
+from pydantic import BaseModel
+
+
+class Candidato(BaseModel):
+    nombre: str
+    archivo: str
+    puntaje: int
+    experiencia_anos: int
+    skills: list[str]
+    educacion: str
+    recomendacion: str
+
+
+class Evaluacion(BaseModel):
+    candidatos: list[Candidato]
+
+
+# Se pasa como `response_format` del modelo y no como `response_model` del agente:
+# con response_model Agno espera la respuesta completa antes de emitirla, y aquí
+# interesa leer cada candidato en cuanto el modelo cierra su objeto.
+CANDIDATES_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": Evaluacion.__name__, "strict": True,
+                    "schema": get_response_schema_for_provider(Evaluacion, "openai")},
+}
+
+_ARRAY_START = re.compile(r'"candidatos"\s*:\s*\[|^\s*(?:```(?:json)?\s*)?\[')
+_DEFAULTS = {"nombre": "", "experiencia_anos": None, "skills": [], "educacion": "", "recomendacion": ""}
+
+
+def clean_candidate(record):
+    """Normaliza un registro del modelo; None si no sirve (sin puntaje numérico)."""
+    if not isinstance(record, dict):
+        return None
+    try:
+        puntaje = float(record.get("puntaje"))
+    except (TypeError, ValueError):
+        return None
+    candidato = {**_DEFAULTS, **record, "puntaje": max(0.0, min(100.0, puntaje))}
+    if not isinstance(candidato["skills"], list):
+        candidato["skills"] = [s.strip() for s in str(candidato["skills"]).split(",") if s.strip()]
+    return candidato
+
+
+class CandidateStream:
+    """Recorre el texto a medida que llega y devuelve cada objeto del array en cuanto se cierra.
+
+    Tolera fences de markdown, texto alrededor y respuestas truncadas: lo que
+    ya se cerró se conserva aunque el resto del JSON no llegue nunca.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.records = []
+        self.complete = False
+        self._pos = None
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """Recibe el texto acumulado (o un fragmento nuevo) y devuelve los candidatos recién cerrados."""
+        self.text = text if text.startswith(self.text) else self.text + text
+        if self._pos is None:
+            match = _ARRAY_START.search(self.text)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        found = []
+        text, i = self.text, self._pos
+        while i < len(text) and not self.complete:
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        candidato = clean_candidate(json.loads(text[self._start:i + 1]))
+                    except json.JSONDecodeError:
+                        candidato = None
+                    if candidato is not None:
+                        found.append(candidato)
+            elif char == "]" and self._depth == 0:
+                self.complete = True
+            i += 1
+        self._pos = i
+        self.records.extend(found)
+        return found
+
+
+def salvage_candidates(text):
+    """Candidatos completos que se puedan rescatar de una respuesta truncada o mal formada."""
+    stream = CandidateStream()
+    stream.feed(text)
+    return stream.records
@@ -0,0 +1,118 @@
+"""Trabajos en segundo plano de RRHH: selección masiva y generación de ofertas."""
+import asyncio
+import io
+
+from common.jobs import get_queue
+from common.ratelimit import lane
+from hr_agent.agents import analyze_cv, run_agent, team_score
+from hr_agent.compaction import compact_cvs
+from hr_agent.extraction import process_zip
+from hr_agent.results import get_store
+from hr_agent.retrieval import get_embedder, shortlist
+from hr_agent.scoring import score_batch
+
+# Un screening idéntico se reutiliza un día, y solo si quedó completo
+SCREENING_DEDUPE_TTL = 24 * 3600
+
+queue = get_queue()
+
+
+def complete_screening(result):
+    return bool(result["candidatos"]) and not result["unscored"]
+
+
+@queue.register("screening", dedupe_ttl=SCREENING_DEDUPE_TTL, reusable=complete_screening)
+async def screening(ctx, zip_bytes, job_desc, skills, exp, team=False, top_k=None):
+    """Extrae, preselecciona, compacta y puntúa un ZIP de CVs.
+
+    Solo los `top_k` CVs más afines al cargo llegan al LLM; las filas
+    puntuadas se publican como resultado parcial. Sus llamadas van en el
+    carril "bulk" del planificador, detrás de las interactivas.
+    """
+    with lane("bulk"):
+        return await _screening(ctx, zip_bytes, job_desc, skills, exp, team, top_k)
+
+
+async def _screening(ctx, zip_bytes, job_desc, skills, exp, team, top_k):
+    ctx.progress(message="📄 Extrayendo CVs...", force=True)
+    cvs_data, names = await asyncio.to_thread(
+        process_zip, io.BytesIO(zip_bytes),
+        on_progress=lambda done, total: ctx.progress(done, total, f"📄 {done}/{total} PDFs"))
+    if not cvs_data:
+        return {"run_id": None, "candidatos": [], "unscored": [], "errors": [], "compaction": [], "preselection": None}
+
+    role = f"{job_desc}. Skills: {skills}. Exp: {exp}años"
+    total = len(names)
+    ctx.progress(message=f"🎯 Preseleccionando entre {total} CVs...", force=True)
+    cvs_data, names, similarity = await asyncio.to_thread(shortlist, cvs_data, names, role, top_k)
+    similarity = dict(zip(names, similarity))
+
+    cvs_data, reports = compact_cvs(cvs_data)
+    if team:
+        score_fn, score_mode = lambda content, on_content: team_score(content, job_desc, skills, exp, on_content), "team"
+    else:
+        score_fn, score_mode = lambda content, on_content: analyze_cv(content, role, "batch", on_content), "batch"
+
+    scored = []
+
+    def on_candidates(candidatos):
+        # Sin force: serializar la tabla parcial en cada fila sería O(n²); se vuelca al terminar
+        scored.extend(candidatos)
+        ctx.progress(message=f"🤖 {len(scored)}/{len(names)} candidatos puntuados", partial=scored)
+
+    ctx.progress(0, 1, "🤖 Puntuando candidatos...", force=True)
+    df, unscored, errors = await score_batch(
+        cvs_data, names, score_fn,
+        on_progress=lambda done, total: ctx.progress(done, total, f"🤖 Lote {done}/{total}"),
+        cache_scope=(role, score_mode), on_candidates=on_candidates)
+    ctx.progress(message=f"🤖 {len(scored)}/{len(names)} candidatos puntuados", partial=scored, force=True)
+    if df.empty and unscored:
+        # Caída de la API, clave inválida...: un fallo, no un resultado vacío reutilizable
+        reason = f": {next(iter(errors.values()))}" if errors else ""
+        raise RuntimeError(f"No se pudo puntuar ninguno de los {len(unscored)} CVs preseleccionados{reason}")
+    if not df.empty:
+        df["similitud"] = df["archivo"].map(similarity)
+        # 🗂️ Histórico columnar: el chat y las consultas posteriores leen de aquí
+        await asyncio.to_thread(get_store().save, ctx.job_id, df.to_dict("records"),
+                                cargo=job_desc, skills=skills, exp=exp, modo="team" if team else "batch")
+    return {"run_id": ctx.job_id if not df.empty else None,
+            "candidatos": df.to_dict("records"), "unscored": unscored,
+            "errors": sorted(set(errors.values())),
+            "preselection": {"total": total, "shortlisted": len(names), "backend": get_embedder().name},
+            "compaction": [{"archivo": n, "tokens_antes": r.tokens_before, "tokens_despues": r.tokens_after,
+                            "ahorro": r.tokens_saved} for n, r in zip(names, reports)]}
+
+
+def offer_prompt(job_title, company_name, job_desc, location, modality, salary_range):
+    return f"""
+            Crea una oferta laboral profesional para: {job_title} en {company_name}
+
+            Descripción: {job_desc}
+            Ubicación: {location} | Modalidad: {modality} | Salario: {salary_range}
+
+            GENERA OFERTA PROFESIONAL:
+
+            🔸 TÍTULO ATRACTIVO (optimizado para búsquedas)
+            🔸 SOBRE LA EMPRESA (2-3 líneas que generen interés)
+            🔸 MISIÓN DEL CARGO (qué impacto tendrá)
+            🔸 RESPONSABILIDADES CLAVE (5 principales, específicas)
+            🔸 REQUISITOS OBLIGATORIOS (técnicos y experiencia)
+            🔸 REQUISITOS DESEABLES (que marquen diferencia)
+            🔸 QUÉ OFRECEMOS (beneficios atractivos y competitivos)
+            🔸 PROCESO DE SELECCIÓN (pasos claros)
+            🔸 CALL TO ACTION (cómo aplicar)
+
+            IMPORTANTE:
+            - Usa lenguaje profesional pero cercano
+            - Incluye keywords para ATS (sistemas de tracking)
+            - Que sea atractivo para candidatos top
+            - Sin asteriscos, solo texto limpio y viñetas (•)
+            """
+
+
+@queue.register("offer")
+async def offer(ctx, **fields):
+    ctx.progress(message="📝 Generando oferta profesional...", force=True)
+    return await run_agent("offer", offer_prompt(**fields),
+                           on_content=lambda text: ctx.progress(partial=text),
+                           on_tool=lambda phase, tool: ctx.progress(message=f"🛠️ {getattr(tool, 'tool_name', '')}..."))
@@ -0,0 +1 @@
+"""Agente de Mapas."""
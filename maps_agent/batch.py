@@ -0,0 +1,176 @@
+"""Modo batch: muchas consultas geográficas desde CSV/JSONL sobre una sola sesión MCP.
+
+La salida JSONL es a la vez el checkpoint: cada resultado se escribe (y se
+vacía a disco) en cuanto llega, y al relanzar se saltan los IDs que ya tienen
+respuesta. Los errores no cuentan como hechos, así que se reintentan; al
+terminar, el error viejo de un ID que ya tiene respuesta se elimina.
+"""
+import asyncio
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPORT_INTERVAL = 5.0
+
+
+# 📥 Entrada
+def read_queries(path, template=None):
+    """Genera {"id", "query", ...} desde un CSV (columna `query` o `template`) o un JSONL.
+
+    Sin columna `id`, el ID es el número de fila: estable entre ejecuciones
+    mientras no cambie el fichero de entrada. Sin `template` la entrada debe
+    traer `query`; si no, ValueError antes de abrir la sesión MCP (en un CSV)
+    o al llegar a la fila que no lo tiene (en un JSONL).
+    """
+    path = Path(path)
+    jsonl = path.suffix.lower() in (".jsonl", ".ndjson")
+    if not jsonl and not template:
+        with path.open(encoding="utf-8", newline="") as f:
+            columns = next(csv.reader(f), [])
+        if "query" not in columns:
+            raise ValueError(f"{path.name} no tiene columna `query` (columnas: {', '.join(columns) or 'ninguna'}); "
+                             "añádela o usa --template para componer la consulta")
+    return _rows(path, jsonl, template)
+
+
+def _rows(path, jsonl, template):
+    with path.open(encoding="utf-8", newline="") as f:
+        rows = (json.loads(line) for line in f if line.strip()) if jsonl else csv.DictReader(f)
+        for number, row in enumerate(rows, 1):
+            if template:
+                try:
+                    query = template.format(**row)
+                except KeyError as e:
+                    raise ValueError(f"{path.name}, fila {number}: la plantilla usa {e} y la fila no lo tiene") from e
+            elif "query" in row:
+                query = row["query"]
+            else:
+                raise ValueError(f"{path.name}, fila {number}: falta `query`; añádelo o usa --template")
+            if query:
+                yield {**row, "id": str(row.get("id") or number), "query": query}
+
+
+# 💾 Checkpoint
+def completed_ids(path):
+    """IDs ya respondidos en la salida; recorta una última línea a medias tras un corte."""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    done, good_bytes = set(), 0
+    with path.open("rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            good_bytes += len(line)
+            if "answer" in record:
+                done.add(str(record["id"]))
+    if good_bytes < path.stat().st_size:
+        with path.open("r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+def compact_output(path):
+    """Deja una línea por ID: la respuesta si la hay, si no el último error.
+
+    Un error reintentado con éxito en otra ejecución deja su línea vieja junto a
+    la respuesta; se reescribe el fichero (vía temporal + rename) solo si sobra algo.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+    keep = {}  # id -> (tiene respuesta, nº de línea a conservar)
+    with path.open("rb") as f:
+        lines = 0
+        for number, line in enumerate(f):
+            lines += 1
+            record = json.loads(line)
+            key, answered = str(record["id"]), "answer" in record
+            if answered or not keep.get(key, (False,))[0]:
+                keep[key] = (answered, number)
+    kept = {number for _, number in keep.values()}
+    if len(kept) == lines:
+        return 0
+    tmp = path.with_name(path.name + ".tmp")
+    with path.open("rb") as f, tmp.open("wb") as out:
+        out.writelines(line for number, line in enumerate(f) if number in kept)
+    os.replace(tmp, path)
+    return lines - len(kept)
+
+
+# 🚀 Ejecución
+async def run_batch(service, queries, out_path, concurrency=None, report=None):
+    """Responde las consultas pendientes con `concurrency` workers y devuelve el resumen.
+
+    `report(stats)` se llama cada REPORT_INTERVAL segundos y al final.
+    """
+    done_ids = completed_ids(out_path)
+    stats = {"answered": 0, "errors": 0, "skipped": 0, "latencies": [], "started": time.perf_counter()}
+    pending = iter(queries)
+
+    with Path(out_path).open("a", encoding="utf-8") as out:
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        async def worker():
+            for item in pending:
+                if item["id"] in done_ids:
+                    stats["skipped"] += 1
+                    continue
+                done_ids.add(item["id"])  # IDs repetidos en la entrada se responden una vez
+                started = time.perf_counter()
+                try:
+                    record = {**item, "answer": await service.ask(item["query"])}
+                    stats["answered"] += 1
+                except Exception as e:
+                    record = {**item, "error": f"{type(e).__name__}: {e}"}
+                    stats["errors"] += 1
+                elapsed = time.perf_counter() - started
+                stats["latencies"].append(elapsed)
+                write({**record, "elapsed_s": round(elapsed, 3)})
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(REPORT_INTERVAL)
+                if report:
+                    report(summary(stats, service))
+
+        progress = asyncio.create_task(reporter())
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency or 1)))
+        finally:
+            progress.cancel()
+    compact_output(out_path)
+    result = summary(stats, service)
+    if report:
+        report(result)
+    return result
+
+
+def summary(stats, service=None):
+    wall = time.perf_counter() - stats["started"]
+    latencies = sorted(stats["latencies"])
+    processed = stats["answered"] + stats["errors"]
+    result = {"answered": stats["answered"], "errors": stats["errors"], "skipped": stats["skipped"],
+              "wall_s": round(wall, 2), "queries_per_s": round(processed / wall, 2) if wall else 0.0}
+    if latencies:
+        result.update(p50_s=round(statistics.median(latencies), 3),
+                      p95_s=round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3))
+    if service is not None:
+        result["tool_cache"] = dict(service.tool_cache.stats)
+    return result
+
+
+def print_report(result):
+    cache = result.get("tool_cache", {})
+    print(f"📊 {result['answered']} ok · {result['errors']} errores · {result['skipped']} ya hechas · "
+          f"{result['queries_per_s']} consultas/s · p95 {result.get('p95_s', '-')}s · "
+          f"caché MCP {cache.get('hits', 0)} hits / {cache.get('coalesced', 0)} coalescidas / "
+          f"{cache.get('misses', 0)} misses", file=sys.stderr)
@@ -1,59 +1,64 @@
+import argparse
 import asyncio
 import os
+import sys
 from pathlib import Path
-from textwrap import dedent
 
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.tools.mcp import MCPTools
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.telemetry import set_service
+from maps_agent.batch import print_report, read_queries, run_batch
+from maps_agent.service import MAX_CONCURRENCY, MapsService, repl, serve
 
 # Cargar las variables del archivo .env
 load_dotenv()
+set_service("maps_agent")
 
-async def create_maps_agent(session):
-    """Crear un agente que use Google Maps via MCP."""
-    mcp_tools = MCPTools(session=session)
-    await mcp_tools.initialize()
-
-    return Agent(
-        model=OpenAIChat(
-            id="gpt-4o-mini",
-            api_key=os.getenv("OPENAI_API_KEY")
-        ),
-        tools=[mcp_tools],
-        instructions=dedent("""\
-            Eres un asistente geográfico experto. Ayudas a los usuarios a obtener información sobre ubicaciones, rutas y lugares de interés.
-
-            - Usa Google Maps para encontrar ubicaciones relevantes
-            - Da respuestas claras, organizadas y en markdown
-            - Ofrece contexto útil sin rodeos
-        """),
-        markdown=True,
-        show_tool_calls=True,
-    )
+def check_env() -> None:
+    if not os.getenv("GOOGLE_MAPS_API_KEY") or not os.getenv("OPENAI_API_KEY"):
+        raise EnvironmentError("Faltan las variables OPENAI_API_KEY o GOOGLE_MAPS_API_KEY en .env")
 
 async def run_agent(message: str) -> None:
     """Ejecuta el agente con Google Maps MCP y un mensaje dado."""
+    check_env()
+    async with MapsService() as service:
+        await service.print_response(message)
 
-    if not os.getenv("GOOGLE_MAPS_API_KEY") or not os.getenv("OPENAI_API_KEY"):
-        raise EnvironmentError("Faltan las variables OPENAI_API_KEY o GOOGLE_MAPS_API_KEY en .env")
-
-    # Preparar el servidor MCP para Google Maps
-    server_params = StdioServerParameters(
-        command="npx",
-        args=["-y", "@modelcontextprotocol/server-google-maps"],
-        env={"GOOGLE_MAPS_API_KEY": os.getenv("GOOGLE_MAPS_API_KEY")},
-    )
+async def run_service(args) -> None:
+    """Mantiene el servidor MCP caliente y atiende muchas consultas (REPL o endpoint local)."""
+    check_env()
+    async with MapsService(concurrency=args.concurrency) as service:
+        if args.serve:
+            print(f"🗺️  Servicio de mapas escuchando en {args.host}:{args.port}")
+            await serve(service, args.host, args.port)
+        else:
+            await repl(service)
 
-    # Crear sesión con el servidor
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            agent = await create_maps_agent(session)
-            await agent.aprint_response(message, stream=True)
+async def run_file(args) -> None:
+    """Responde todas las consultas de un CSV/JSONL y las escribe en JSONL (reanudable)."""
+    check_env()
+    queries = read_queries(args.batch, args.template)  # falla aquí si falta `query`, antes de abrir la sesión
+    concurrency = args.concurrency or MAX_CONCURRENCY
+    async with MapsService(concurrency=concurrency) as service:
+        await run_batch(service, queries, args.out, concurrency, print_report)
 
 if __name__ == "__main__":
-    # Ejemplo de pregunta
-    asyncio.run(run_agent("¿Busca los 5 mejores restaurantes que hay cerca de La Plaza de Bolivar de Pereira Colombia?"))
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Agente de mapas con Google Maps MCP")
+    parser.add_argument("--repl", action="store_true", help="REPL interactivo sobre una sesión MCP persistente")
+    parser.add_argument("--serve", action="store_true", help="Endpoint local JSON-lines sobre una sesión MCP persistente")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=None, help="Consultas simultáneas máximas")
+    parser.add_argument("--batch", help="CSV/JSONL de consultas (columna `query` o --template, `id` opcional)")
+    parser.add_argument("--out", default="maps_results.jsonl", help="Salida JSONL; relanzar con el mismo fichero reanuda")
+    parser.add_argument("--template", help='Plantilla de consulta con columnas del CSV, p. ej. "Restaurantes cerca de {direccion}"')
+    args = parser.parse_args()
+
+    if args.batch:
+        asyncio.run(run_file(args))
+    elif args.repl or args.serve:
+        asyncio.run(run_service(args))
+    else:
+        # Ejemplo de pregunta
+        asyncio.run(run_agent("¿Busca los 5 mejores restaurantes que hay cerca de La Plaza de Bolivar de Pereira Colombia?"))
@@ -0,0 +1,241 @@
+"""Servicio de mapas de larga duración: un solo subproceso MCP caliente para muchas consultas."""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+from textwrap import dedent
+
+import anyio
+from agno.agent import Agent
+from agno.tools.mcp import MCPTools
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+
+from common.registry import chat_model
+from common.telemetry import instrument, span
+from maps_agent.tool_cache import McpToolCache
+
+# ⚙️ Defaults (sobrescribibles por variables de entorno)
+MAX_CONCURRENCY = int(os.getenv("MAPS_CONCURRENCY", 4))
+HEALTH_INTERVAL = float(os.getenv("MAPS_HEALTH_INTERVAL", 15))
+STARTUP_TIMEOUT = float(os.getenv("MAPS_STARTUP_TIMEOUT", 60))
+
+INSTRUCTIONS = dedent("""\
+    Eres un asistente geográfico experto. Ayudas a los usuarios a obtener información sobre ubicaciones, rutas y lugares de interés.
+
+    - Usa Google Maps para encontrar ubicaciones relevantes
+    - Da respuestas claras, organizadas y en markdown
+    - Ofrece contexto útil sin rodeos
+""")
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLost(ConnectionError):
+    """Una herramienta MCP falló por la sesión durante la consulta (Agno lo devuelve como texto)."""
+
+
+# Errores que indican que el subproceso o la sesión MCP murieron
+SESSION_ERRORS = (McpError, anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+# Fallos de sesión vistos por las herramientas de la consulta en curso
+_session_failures = contextvars.ContextVar("maps_session_failures", default=None)
+
+
+def google_maps_server():
+    """Parámetros del servidor MCP de Google Maps (npx)."""
+    return StdioServerParameters(
+        command="npx",
+        args=["-y", "@modelcontextprotocol/server-google-maps"],
+        env={"GOOGLE_MAPS_API_KEY": os.getenv("GOOGLE_MAPS_API_KEY")},
+    )
+
+
+def create_maps_agent(mcp_tools):
+    """Crear un agente que use Google Maps via MCP."""
+    return instrument(Agent(
+        model=chat_model("gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY")),
+        tools=[mcp_tools],
+        instructions=INSTRUCTIONS,
+        markdown=True,
+        show_tool_calls=True,
+    ))
+
+
+class MapsService:
+    """Mantiene viva una sesión MCP y atiende consultas concurrentes sobre ella.
+
+    Una tarea supervisora es dueña del subproceso (los context managers de
+    anyio deben abrirse y cerrarse en la misma tarea); si el servidor muere
+    o deja de responder al ping, se reinicia con backoff exponencial.
+    """
+
+    def __init__(self, server_params=None, agent_factory=create_maps_agent,
+                 concurrency=None, health_interval=None, tool_cache=None):
+        self.server_params = server_params or google_maps_server()
+        self.agent_factory = agent_factory
+        # Sobrevive a los reinicios del subproceso: las herramientas nuevas se vuelven a envolver
+        self.tool_cache = tool_cache or McpToolCache()
+        self.health_interval = health_interval or HEALTH_INTERVAL
+        self.restarts = -1
+        self._semaphore = asyncio.Semaphore(concurrency or MAX_CONCURRENCY)
+        self._ready = asyncio.Event()
+        self._restart = asyncio.Event()
+        self._closing = False
+        self._tools = None
+        self._supervisor = None
+        self._last_error = None
+
+    async def start(self):
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+        await self._wait_ready()
+        return self
+
+    async def close(self):
+        self._closing = True
+        self._restart.set()
+        if self._supervisor is not None:
+            await self._supervisor
+            self._supervisor = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _supervise(self):
+        backoff = 1
+        while not self._closing:
+            try:
+                async with stdio_client(self.server_params) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        tools = MCPTools(session=session)
+                        await tools.initialize()
+                        self.tool_cache.wrap(tools, on_session_error=self._session_failed)
+                        self._tools, backoff = tools, 1
+                        self.restarts += 1
+                        self._restart.clear()
+                        self._last_error = None
+                        self._ready.set()
+                        await self._watch(session)
+            except Exception as e:
+                self._last_error = e
+                logger.warning("Sesión MCP caída o sin arrancar (reintento en %ss): %r", backoff, e)
+            finally:
+                self._ready.clear()
+                self._tools = None
+            if not self._closing:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def _watch(self, session):
+        """Espera un reinicio pedido o a que el servidor deje de responder al ping."""
+        while not self._restart.is_set():
+            try:
+                await asyncio.wait_for(self._restart.wait(), timeout=self.health_interval)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(session.send_ping(), timeout=self.health_interval)
+
+    async def _wait_ready(self):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=STARTUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            detail = f": {self._last_error!r}" if self._last_error else ""
+            raise RuntimeError(f"El servidor MCP no arrancó a tiempo{detail}") from self._last_error
+
+    def _request_restart(self):
+        self._ready.clear()
+        self._restart.set()
+
+    def _session_failed(self, tool_name, result):
+        """Hook de la caché: una herramienta devolvió un error de sesión en lugar de lanzar."""
+        logger.warning("Error de sesión en %s: %s", tool_name, result)
+        failures = _session_failures.get()
+        if failures is not None:
+            failures.append(f"{tool_name}: {result}")
+        self._request_restart()
+
+    async def _run(self, message, **kwargs):
+        await self._wait_ready()
+        agent = self.agent_factory(self._tools)
+        with span("maps", "run", query=message[:200], restarts=self.restarts):
+            return await agent.arun(message, **kwargs)
+
+    async def _answer(self, message):
+        failures = []
+        token = _session_failures.set(failures)
+        try:
+            response = await self._run(message)
+        finally:
+            _session_failures.reset(token)
+        # Una respuesta construida sobre herramientas sin sesión no vale como respuesta
+        if failures:
+            raise SessionLost(f"La sesión MCP falló durante la consulta ({failures[0]})")
+        return response.content
+
+    async def ask(self, message):
+        """Responde una consulta; si la sesión murió a mitad, reinicia y reintenta una vez."""
+        async with self._semaphore:
+            try:
+                return await self._answer(message)
+            except SESSION_ERRORS:
+                self._request_restart()
+                return await self._answer(message)
+
+    async def print_response(self, message):
+        async with self._semaphore:
+            await self._wait_ready()
+            agent = self.agent_factory(self._tools)
+            with span("maps", "run", query=message[:200]):
+                await agent.aprint_response(message, stream=True)
+
+
+async def repl(service):
+    """REPL asíncrono: una consulta por línea sobre la sesión ya caliente."""
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await loop.run_in_executor(None, input, "\n🗺️  > ")
+        if message.strip().lower() in ("", "salir", "exit", "quit"):
+            break
+        await service.print_response(message)
+
+
+async def serve(service, host="127.0.0.1", port=8765):
+    """Endpoint local JSON-lines: cada línea {"query": ...} recibe {"answer": ...} o {"error": ...}.
+
+    Las consultas de una misma conexión o de conexiones distintas se atienden
+    en paralelo (acotadas por la concurrencia del servicio).
+    """
+    async def handle(reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            try:
+                request = json.loads(line)
+                reply = {"id": request.get("id"), "answer": await service.ask(request["query"])}
+            except Exception as e:
+                reply = {"error": str(e)}
+            async with lock:
+                writer.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
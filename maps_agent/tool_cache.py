@@ -0,0 +1,73 @@
+"""Caché TTL con coalescencia para las llamadas a herramientas MCP de Google Maps.
+
+A diferencia de la caché financiera, las herramientas MCP ya son corrutinas
+ligadas a la sesión: las llamadas idénticas en vuelo comparten una
+`asyncio.Task` en lugar de un hilo.
+"""
+import asyncio
+import os
+
+from common.telemetry import annotate
+from common.tool_cache import CoalescingCache, is_error
+
+# ⏱️ TTL por herramienta (segundos): geocodificación casi estática, lugares y rutas más cortos
+TOOL_TTLS = {
+    "maps_geocode": 30 * 24 * 3600,
+    "maps_reverse_geocode": 30 * 24 * 3600,
+    "maps_elevation": 30 * 24 * 3600,
+    "maps_place_details": 24 * 3600,
+    "maps_search_places": 6 * 3600,
+    "maps_distance_matrix": 3600,
+    "maps_directions": 3600,
+}
+DEFAULT_TTL = float(os.getenv("MAPS_TOOL_TTL", 3600))
+
+
+def is_session_error(result):
+    """Agno devuelve "Error: ..." para cualquier excepción de la herramienta; los errores
+    propios del servidor MCP llegan como "Error: Error from MCP tool ...", el resto es la sesión."""
+    return is_error(result) and not result.lstrip().startswith("Error: Error from MCP tool")
+
+
+class McpToolCache(CoalescingCache):
+    """Resultados por (herramienta, argumentos) con TTL, LRU y coalescencia de llamadas en vuelo."""
+
+    def __init__(self, max_entries=50_000):
+        super().__init__(max_entries)
+
+    async def call(self, name, fn, kwargs, ttl):
+        key = self.key(name, kwargs)
+        found, result = self.lookup(key)
+        if found:
+            annotate(cache="hit")
+            return result
+        task = self._submit(key, lambda: asyncio.ensure_future(fn(**kwargs)), ttl)
+        # La llamada es una tarea propia: cancelar a cualquier llamador, también al
+        # primero, no la cancela para los demás que la esperan
+        return await asyncio.shield(task)
+
+    def wrap(self, toolkit, ttls=None, on_session_error=None):
+        """Envuelve las funciones de un MCPTools ya inicializado (se repite tras cada reinicio).
+
+        `on_session_error(herramienta, resultado)` se llama cuando la sesión
+        murió bajo la llamada, para que el servicio la reinicie.
+        """
+        ttls = {**TOOL_TTLS, **(ttls or {})}
+        for name, function in toolkit.functions.items():
+            entrypoint = function.entrypoint
+            if entrypoint is None or getattr(entrypoint, "__cached__", False):
+                continue
+
+            def make_wrapper(name, entrypoint):
+                # `agent` lo inyecta Agno; no forma parte de la clave
+                async def wrapper(agent=None, **kwargs):
+                    call = lambda **args: entrypoint(agent=agent, **args)
+                    result = await self.call(name, call, kwargs, ttls.get(name, DEFAULT_TTL))
+                    if on_session_error and is_session_error(result):
+                        on_session_error(name, result)
+                    return result
+                wrapper.__cached__ = True
+                return wrapper
+
+            function.entrypoint = make_wrapper(name, entrypoint)
+        return toolkit
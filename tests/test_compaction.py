@@ -0,0 +1,45 @@
+from hr_agent.compaction import compact_cv, count_tokens, normalize
+
+CV = "\n".join([
+    "Ana Gómez",
+    "Ingeniera de datos",
+    "Perfil profesional",
+    "Profesional proactiva, orientada a resultados, con capacidad de trabajo en equipo y liderazgo. " * 6,
+    "Experiencia laboral",
+    *[f"Empresa {i} (2015-2020): construí pipelines de datos en Python, Spark y Airflow para el área {i}." for i in range(12)],
+    "Habilidades",
+    "Python, SQL, Spark, Airflow, dbt, AWS",
+    "Educación",
+    "Ingeniería de Sistemas, Universidad Nacional",
+    "Certificaciones",
+    "AWS Certified Data Engineer, Scrum Master, curso de liderazgo, curso de comunicación asertiva",
+    "Intereses",
+    "Ciclismo, lectura, fotografía",
+])
+
+
+def test_core_sections_are_filled_before_profile_boilerplate():
+    report = compact_cv(CV, budget=300)
+    assert report.tokens_after <= 300
+    assert report.sections[:4] == ["encabezado", "experiencia", "habilidades", "educacion"]
+    # La experiencia no cabe entera: nada del presupuesto se va en perfil, certificaciones o intereses
+    assert not {"perfil", "certificaciones", "intereses"} & set(report.sections)
+
+
+def test_small_cv_is_kept_whole():
+    report = compact_cv("Ana Gómez\nExperiencia\nAnalista de datos en Bancolombia\nHabilidades\nSQL", budget=300)
+    assert report.sections == ["encabezado", "experiencia", "habilidades"]
+    assert count_tokens(report.text) == report.tokens_after
+
+
+def test_repeated_job_title_is_not_taken_for_a_page_header():
+    page_1 = "\n".join(["Ana Gómez · +57 300 000 0000", "Experiencia", "Analista de datos",
+                        "Bancolombia (2018-2020): reportes de riesgo en SQL.", "Página 1 de 2"])
+    page_2 = "\n".join(["Ana Gómez · +57 300 000 0000", "Analista de datos",
+                        "Ecopetrol (2020-2024): modelos de demanda en Python.", "Página 2 de 2"])
+    text = normalize("\f".join([page_1, page_2]))
+    # El cargo repetido sigue separando los dos empleos; el encabezado de página sí desaparece
+    assert text.count("Analista de datos") == 2
+    assert text.count("Ana Gómez") == 1
+    assert "Página" not in text
+    assert text.index("Bancolombia") < text.rindex("Analista de datos") < text.index("Ecopetrol")
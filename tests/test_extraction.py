@@ -0,0 +1,47 @@
+import io
+import os
+import zipfile
+
+from hr_agent import extraction
+
+
+def fake_extract(data):
+    if data == b"crash":
+        os._exit(1)  # como un OOM kill o un segfault del parser
+    return data.decode()
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_dead_worker_does_not_abort_batch(monkeypatch):
+    monkeypatch.setattr(extraction, "extract_pdf_text", fake_extract)
+    files = [("a.pdf", b"texto a"), ("malo.pdf", b"crash")] + [(f"cv{i}.pdf", f"texto {i}".encode()) for i in range(6)]
+
+    results = dict(extraction.iter_zip_texts(make_zip(files), max_workers=2, timeout=10, use_cache=False))
+
+    assert set(results) == {name for name, _ in files}
+    assert results["malo.pdf"] == ""
+    # Lo que se encoló después del fallo se procesa en el pool nuevo
+    assert results["cv5.pdf"] == "texto 5"
+
+
+def test_unreadable_member_still_counts_for_progress(monkeypatch):
+    monkeypatch.setattr(extraction, "extract_pdf_text", fake_extract)
+    good = "Ana Gómez, ingeniera de datos con Python, SQL y Spark en Bancolombia."
+    buffer = make_zip([("ana.pdf", good.encode()), ("roto.pdf", b"contenido que se corrompe")])
+    # Los miembros van sin comprimir: cambiar los bytes rompe el CRC-32 y zip_ref.read falla
+    corrupted = buffer.getvalue().replace(b"contenido que se corrompe", b"CONTENIDO QUE SE CORROMPE")
+    progress = []
+
+    texts, names = extraction.process_zip(io.BytesIO(corrupted), max_workers=1, timeout=10, use_cache=False,
+                                          on_progress=lambda done, total: progress.append((done, total)))
+
+    assert names == ["ana.pdf"] and texts == [good]
+    assert progress[-1] == (2, 2)
@@ -0,0 +1,106 @@
+import asyncio
+import sqlite3
+import time
+
+from common.jobs import HOST, JobQueue
+
+
+def wait_for(queue, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"{job_id} sigue en {queue.get(job_id)['status']}")
+
+
+def test_second_queue_keeps_running_jobs_of_live_process(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    first = JobQueue(path, workers=1)
+    release = asyncio.Event()
+
+    @first.register("slow")
+    async def slow(ctx):
+        await release.wait()
+        return "ok"
+
+    job_id = first.submit("slow", {})
+    wait_for(first, job_id, {"running"})
+
+    JobQueue(path)  # otra app sobre la misma base
+    assert first.get(job_id)["status"] == "running"
+
+    first._loop.call_soon_threadsafe(release.set)
+    assert wait_for(first, job_id, {"done", "failed"})["status"] == "done"
+
+
+def test_jobs_of_dead_process_are_failed(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    JobQueue(path)
+    db = sqlite3.connect(path, isolation_level=None)
+    db.execute("INSERT INTO jobs (id, kind, owner, input_hash, status, created_at, host, pid) "
+               "VALUES ('gone', 'slow', 'anon', 'x', 'running', ?, ?, 2147483647)", (time.time(), HOST))
+
+    job = JobQueue(path).get("gone")
+    assert job["status"] == "failed"
+    assert job["error"] == "Interrumpido por reinicio"
+
+
+def test_incomplete_results_are_not_reused(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", workers=1)
+
+    @queue.register("screening", dedupe_ttl=3600, reusable=lambda result: not result["unscored"])
+    async def screening(ctx, zip_name):
+        return {"unscored": ["a.pdf"] if zip_name == "caida.zip" else []}
+
+    failed_run = queue.submit("screening", {"zip_name": "caida.zip"})
+    wait_for(queue, failed_run, {"done"})
+    assert queue.submit("screening", {"zip_name": "caida.zip"}) != failed_run
+
+    good_run = queue.submit("screening", {"zip_name": "ok.zip"})
+    wait_for(queue, good_run, {"done"})
+    assert queue.submit("screening", {"zip_name": "ok.zip"}) == good_run
+
+
+def test_follow_streams_events_until_done(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", workers=1)
+    subscribed = asyncio.Event()
+
+    @queue.register("analysis")
+    async def analysis(ctx):
+        await subscribed.wait()
+        ctx.emit("tool", "started", "get_current_stock_price")
+        ctx.emit("content", "Apple")
+        ctx.emit("content", "Apple sube")
+        return "Apple sube"
+
+    job_id = queue.submit("analysis", {})
+    wait_for(queue, job_id, {"running"})
+    # El generador se suscribe al pedir el primer evento; el handler espera un poco antes de emitir
+    queue._loop.call_soon_threadsafe(queue._loop.call_later, 0.05, subscribed.set)
+    events = list(queue.follow(job_id))
+    assert events == [("tool", "started", "get_current_stock_price"), ("content", "Apple"), ("content", "Apple sube")]
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_run_interactive_uses_one_loop_and_calls_back_in_caller_thread(tmp_path):
+    import threading
+
+    from common.ratelimit import current_lane, lane
+
+    queue = JobQueue(tmp_path / "jobs.sqlite3", workers=1)
+    seen = []
+
+    async def agent(prompt, on_content=None):
+        on_content(prompt.upper())
+        return asyncio.get_running_loop(), current_lane()
+
+    with lane("interactive"):
+        first_loop, first_lane = queue.run_interactive(
+            agent, "hola", on_content=lambda text: seen.append((text, threading.current_thread())))
+    second_loop, _ = queue.run_interactive(agent, "chao", on_content=lambda text: None)
+
+    assert first_loop is second_loop is queue._loop
+    assert first_lane == "interactive"
+    assert seen == [("HOLA", threading.current_thread())]
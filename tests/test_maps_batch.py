@@ -0,0 +1,61 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from maps_agent.batch import completed_ids, read_queries, run_batch
+
+
+def test_csv_without_query_column_needs_a_template(tmp_path):
+    path = tmp_path / "sedes.csv"
+    path.write_text("id,direccion\n7,Cra 7 # 32-16 Bogotá\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="query"):
+        read_queries(path)
+    assert list(read_queries(path, "Restaurantes cerca de {direccion}")) == [
+        {"id": "7", "direccion": "Cra 7 # 32-16 Bogotá", "query": "Restaurantes cerca de Cra 7 # 32-16 Bogotá"}]
+
+
+def test_jsonl_row_without_query_is_reported(tmp_path):
+    path = tmp_path / "consultas.jsonl"
+    path.write_text('{"query": "Museos en Medellín"}\n{"id": "b", "ciudad": "Cali"}\n', encoding="utf-8")
+    rows = read_queries(path)
+    assert next(rows) == {"id": "1", "query": "Museos en Medellín"}
+    with pytest.raises(ValueError, match="fila 2"):
+        next(rows)
+
+
+def fake_service(asked):
+    async def ask(query):
+        asked.append(query)
+        return f"Respuesta: {query}"
+    return SimpleNamespace(ask=ask, tool_cache=SimpleNamespace(stats={}))
+
+
+def test_truncated_last_line_is_cut_and_retried(tmp_path):
+    out = tmp_path / "resultados.jsonl"
+    answered = json.dumps({"id": "1", "query": "Museos en Medellín", "answer": "..."}) + "\n"
+    out.write_text(answered + '{"id": "2", "query": "Parques en Ca', encoding="utf-8")
+    assert completed_ids(out) == {"1"}
+    assert out.read_text(encoding="utf-8") == answered
+
+
+def test_resume_skips_answers_and_replaces_old_errors(tmp_path):
+    out = tmp_path / "resultados.jsonl"
+    out.write_text("".join(json.dumps(record) + "\n" for record in [
+        {"id": "1", "query": "Museos en Medellín", "answer": "Museo de Antioquia"},
+        {"id": "2", "query": "Parques en Cali", "error": "SessionLost: sesión MCP caída"},
+        {"id": "2", "query": "Parques en Cali", "error": "TimeoutError: "},
+    ]), encoding="utf-8")
+    queries = [{"id": "1", "query": "Museos en Medellín"}, {"id": "2", "query": "Parques en Cali"},
+               {"id": "3", "query": "Playas en Santa Marta"}]
+    asked = []
+
+    result = asyncio.run(run_batch(fake_service(asked), queries, out, concurrency=2))
+
+    assert sorted(asked) == ["Parques en Cali", "Playas en Santa Marta"]
+    assert (result["answered"], result["skipped"], result["errors"]) == (2, 1, 0)
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    # Una línea por ID: la respuesta nueva sustituye a los errores de la ejecución anterior
+    assert sorted(r["id"] for r in records) == ["1", "2", "3"]
+    assert all("answer" in r for r in records)
@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from maps_agent.service import MapsService, SessionLost
+from maps_agent.tool_cache import McpToolCache
+
+
+def toolkit(results):
+    """MCPTools falso: cada llamada devuelve el siguiente resultado, como el entrypoint de Agno."""
+    async def call_tool(agent=None, **kwargs):
+        return results.pop(0)
+    return SimpleNamespace(functions={"maps_geocode": SimpleNamespace(entrypoint=call_tool)})
+
+
+def service_with(results):
+    async def arun(message):
+        answer = await tools.functions["maps_geocode"].entrypoint(address=message)
+        return SimpleNamespace(content=f"Respuesta con {answer}")
+
+    service = MapsService(server_params=object(), agent_factory=lambda _: SimpleNamespace(arun=arun),
+                          tool_cache=McpToolCache())
+    tools = service.tool_cache.wrap(toolkit(results), on_session_error=service._session_failed)
+    service._tools = tools
+    service._ready.set()
+    # Sin subproceso real: el "reinicio" deja la sesión lista de inmediato
+    service._request_restart = lambda: service._restart.set()
+    return service
+
+
+def test_session_error_is_retried_once():
+    service = service_with(["Error: ", "Bogotá 4.71,-74.07"])
+    assert asyncio.run(service.ask("Bogotá")) == "Respuesta con Bogotá 4.71,-74.07"
+    assert service._restart.is_set()
+
+
+def test_repeated_session_error_raises_instead_of_answering():
+    service = service_with(["Error: ", "Error: Connection closed"])
+    with pytest.raises(SessionLost):
+        asyncio.run(service.ask("Bogotá"))
+
+
+def test_tool_errors_from_the_server_are_normal_answers():
+    service = service_with(["Error: Error from MCP tool 'maps_geocode': ZERO_RESULTS"])
+    assert asyncio.run(service.ask("zzz")).startswith("Respuesta con Error: Error from MCP tool")
+    assert not service._restart.is_set()
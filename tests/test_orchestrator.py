@@ -0,0 +1,15 @@
+import pytest
+
+from financial_agent.orchestrator import find_tickers
+
+
+@pytest.mark.parametrize("query, tickers", [
+    ("Compara Tesla vs Ford: finanzas + noticias", ["TSLA", "F"]),
+    ("Nvidia vs AMD: comparación técnica", ["NVDA", "AMD"]),
+    ("Compara Apple vs Meta", ["AAPL", "META"]),
+    ("¿Cuál es la meta de inflación del Banco de la República?", []),
+    ("Meta de inflación para 2025 y su impacto en el COP", []),
+    ("Analiza el ROI de invertir en MSFT", ["MSFT"]),
+])
+def test_find_tickers(query, tickers):
+    assert find_tickers(query) == tickers
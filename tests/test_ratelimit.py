@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAI
+from common import ratelimit
+from common.ratelimit import ModelLimiter, Scheduler, lane, scheduled
+
+MODEL = "gpt-4o-mini"
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Planificador propio por test, con buckets holgados salvo que el test los cambie."""
+    monkeypatch.setattr(ratelimit, "scheduler", Scheduler({MODEL: (60_000, 10_000_000)}))
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0.01)
+    return ratelimit.scheduler.limiter(MODEL)
+
+
+def completion(fake, on_call=None):
+    client = openai.AsyncOpenAI(api_key="test", base_url=fake.base_url, max_retries=0)
+
+    async def call():
+        if on_call:
+            on_call()
+        return await client.chat.completions.create(model=MODEL, messages=[{"role": "user", "content": "hola"}])
+    return call
+
+
+def test_retry_after_is_honoured(limiter):
+    attempts = []
+    with FakeOpenAI(latency=0.01, error_rate=1.0, retry_after=0.4) as fake:
+        def on_call():
+            if attempts:
+                fake.error_rate = 0.0
+            attempts.append(time.monotonic())
+
+        response = asyncio.run(scheduled(MODEL, 100, completion(fake, on_call)))
+
+    assert response.choices[0].message.content
+    assert fake.rejected == 1
+    assert attempts[1] - attempts[0] >= 0.4
+    assert limiter.stats["retries"] == 1
+
+
+def test_connection_errors_retry_without_shrinking_window(limiter):
+    attempts = []
+    with FakeOpenAI(latency=0.01) as fake:
+        call = completion(fake)
+
+        async def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise openai.APIConnectionError(request=httpx.Request("POST", fake.base_url))
+            return await call()
+
+        limit = limiter.limit
+        response = asyncio.run(scheduled(MODEL, 100, flaky))
+
+    assert response.choices[0].message.content
+    assert len(attempts) == 2
+    assert limiter.limit >= limit
+    assert limiter.stats["retries"] == 1
+
+
+def test_limit_halves_once_per_generation_of_429s():
+    limiter = ModelLimiter(MODEL, rpm=60_000, tpm=10_000_000, concurrency=8)
+
+    async def burst():
+        return [await limiter.acquire(100) for _ in range(8)]
+
+    epochs = asyncio.run(burst())
+    for epoch in epochs[:6]:  # 6 de las 8 en vuelo reciben 429 a la vez
+        limiter.release(100, status=429, epoch=epoch)
+    assert limiter.limit == 4
+
+    # Las lanzadas después de la reducción sí pueden volver a reducirla
+    epoch = asyncio.run(limiter.acquire(100))
+    limiter.release(100, status=429, epoch=epoch)
+    assert limiter.limit == 2
+
+
+def test_concurrency_converges_to_server_limit(limiter):
+    samples = []
+
+    async def run(call):
+        async def sample():
+            while True:
+                samples.append(limiter.limit)
+                await asyncio.sleep(0.01)
+
+        sampler = asyncio.create_task(sample())
+        await asyncio.gather(*(scheduled(MODEL, 100, call) for _ in range(100)))
+        sampler.cancel()
+
+    with FakeOpenAI(latency=0.02, max_concurrent=2) as fake:
+        asyncio.run(run(completion(fake)))
+
+    # Empieza en 8; AIMD oscila justo por encima del límite real (2) en lugar de quedarse arriba
+    steady = samples[len(samples) // 4:]
+    assert sum(steady) / len(steady) < 3.5
+    assert fake.rejected < fake.requests / 2
+
+
+def test_interactive_lane_goes_first(limiter):
+    limiter.limit = limiter.max_limit = 1  # un turno: el orden de llegada al modelo es el de la cola
+    order = []
+
+    async def run():
+        with FakeOpenAI(latency=0.05) as fake:
+            call = completion(fake)
+
+            async def request(name, lane_name):
+                with lane(lane_name):
+                    await scheduled(MODEL, 100, call)
+                order.append(name)
+
+            tasks = [asyncio.create_task(request(f"bulk{i}", "bulk")) for i in range(3)]
+            await asyncio.sleep(0.01)  # bulk0 ocupa el único turno, bulk1 y bulk2 esperan
+            tasks.append(asyncio.create_task(request("chat", "interactive")))
+            await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["bulk0", "chat", "bulk1", "bulk2"]
+
+
+def test_token_bucket_refills_over_time():
+    limiter = ModelLimiter(MODEL, rpm=600, tpm=6000)  # 10 peticiones/s y 100 tokens/s
+    limiter._requests, limiter._tokens = 0.0, 6000.0
+
+    async def take(tokens):
+        started = time.monotonic()
+        await limiter.acquire(tokens)
+        limiter.release(tokens)
+        return time.monotonic() - started
+
+    assert 0.08 <= asyncio.run(take(10)) < 0.5  # una petición tarda 0.1 s en reponerse
+
+    limiter._requests, limiter._tokens = 600.0, 0.0
+    assert 0.4 <= asyncio.run(take(50)) < 1.0  # 50 tokens a 100 tokens/s
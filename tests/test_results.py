@@ -0,0 +1,32 @@
+import pytest
+
+from hr_agent.results import chat_context, plan, query, to_frame
+
+
+@pytest.fixture
+def df():
+    return to_frame([
+        {"archivo": "a.pdf", "nombre": "Ana Gómez", "puntaje": 90, "experiencia_anos": 5, "skills": ["Python", "SQL"]},
+        {"archivo": "b.pdf", "nombre": "Beto Ruiz", "puntaje": 80, "experiencia_anos": 3, "skills": ["Python"]},
+        {"archivo": "c.pdf", "nombre": "Caro Díaz", "puntaje": 70, "experiencia_anos": 2, "skills": ["Java"]},
+    ])
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("¿Quién sabe python y tiene más de 3 años?", ["Ana Gómez"]),
+    ("¿Quién sabe python y tiene al menos 3 años?", ["Ana Gómez", "Beto Ruiz"]),
+    ("candidatos con mínimo 3 años", ["Ana Gómez", "Beto Ruiz"]),
+    ("puntaje mayor a 80", ["Ana Gómez"]),
+    ("puntaje de al menos 80", ["Ana Gómez", "Beto Ruiz"]),
+])
+def test_bounds_follow_the_wording(df, question, expected):
+    spec = plan(question, df)
+    rows = query(df, skills=spec["skills"], score=spec["score"], years=spec["years"], names=spec["names"])
+    assert list(rows["nombre"]) == expected
+
+
+def test_chat_context_sends_only_matching_rows(df):
+    context = chat_context("¿Quién sabe python y tiene más de 3 años?", df)
+    assert "Mostrando 1 de 3 candidatos" in context
+    assert "años>3" in context
+    assert "Beto Ruiz" not in context
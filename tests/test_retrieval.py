@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from hr_agent import retrieval
+from hr_agent.retrieval import HASH_DIM, HashingTfidf, VectorIndex, shortlist
+
+CVS = {
+    "ana.pdf": "Ingeniera de datos. Python, SQL, Spark y Airflow en Bancolombia.",
+    "luis.pdf": "Chef con experiencia en cocina mediterránea y gestión de restaurantes.",
+    "sofia.pdf": "Analista de datos: SQL, Power BI y Python para reportes de riesgo.",
+    "pedro.pdf": "Conductor de transporte escolar con licencia C2.",
+}
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrieval, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(retrieval, "_indexes", {})
+    return tmp_path
+
+
+def test_shortlist_keeps_the_closest_cvs_in_order(index_dir):
+    cvs, names, scores = shortlist(list(CVS.values()), list(CVS), "Ingeniero de datos Python SQL Spark",
+                                   top_k=2, embedder=HashingTfidf())
+    assert names == ["ana.pdf", "sofia.pdf"]
+    assert cvs == [CVS["ana.pdf"], CVS["sofia.pdf"]]
+    assert scores[0] >= scores[1] > 0
+    # Los vectores quedan indexados para la siguiente preselección
+    assert len(retrieval.get_index(HashingTfidf())) == len(CVS)
+
+
+def test_index_evicts_least_recently_used_rows(tmp_path):
+    row_bytes = HASH_DIM * 4
+    index = VectorIndex(tmp_path / "vectors.npz", max_bytes=3 * row_bytes)
+    vectors = np.eye(4, HASH_DIM, dtype=np.float32)
+    for key, vector in zip("abc", vectors):
+        index.add([key], [vector])
+    index.lookup(["a"])  # "a" se usó después que "b" y "c": "b" es ahora el menos reciente
+    index.add(["d"], vectors[3:])
+
+    assert len(index) == 3
+    matrix, missing = index.lookup(["a", "b", "c", "d"])
+    assert missing == [1]
+    assert np.array_equal(matrix[3], vectors[3])
+    # El fichero también queda acotado y conserva el orden de uso al recargarse
+    reloaded = VectorIndex(tmp_path / "vectors.npz", max_bytes=3 * row_bytes)
+    assert len(reloaded) == 3
+    assert (tmp_path / "vectors.npz").stat().st_size < 4 * row_bytes
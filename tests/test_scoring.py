@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+
+from hr_agent.scoring import parse_candidates, score_batch
+
+
+def api_error(cls, status):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+    return cls("Incorrect API key provided", response=response, body=None)
+
+
+def test_auth_errors_are_not_retried_and_are_reported():
+    calls = 0
+
+    async def score_fn(content, on_content):
+        nonlocal calls
+        calls += 1
+        raise api_error(openai.AuthenticationError, 401)
+
+    df, unscored, errors = asyncio.run(score_batch(["cv uno", "cv dos"], ["a.pdf", "b.pdf"], score_fn, shard_size=1))
+    assert df.empty
+    assert unscored == ["a.pdf", "b.pdf"]
+    assert calls == 2  # una vez por shard, sin reintentos
+    assert errors["a.pdf"].startswith("AuthenticationError")
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    async def score_fn(content, on_content):
+        attempts.append(content)
+        if len(attempts) == 1:
+            raise api_error(openai.InternalServerError, 500)
+        return json.dumps({"candidatos": [{"archivo": "a.pdf", "nombre": "Ana", "puntaje": 80}]})
+
+    df, unscored, errors = asyncio.run(score_batch(["cv uno"], ["a.pdf"], score_fn, retries=2))
+    assert len(attempts) == 2
+    assert list(df["archivo"]) == ["a.pdf"]
+    assert unscored == [] and errors == {}
+
+
+def test_bare_top_level_array_is_accepted():
+    record = {"nombre": "Ana", "archivo": "ana.pdf", "puntaje": 80}
+    assert [c["nombre"] for c in parse_candidates(json.dumps([record]))] == ["Ana"]
+    assert [c["nombre"] for c in parse_candidates("```json\n" + json.dumps([record]) + "\n```")] == ["Ana"]
+    with pytest.raises(ValueError):
+        parse_candidates(json.dumps({"resultado": [record]}))
@@ -0,0 +1,32 @@
+import pytest
+
+from financial_agent.orchestrator import find_tickers
+from financial_agent.semantic_cache import NgramEmbedder, SemanticCache
+
+BASE = "Analiza acciones de Apple + noticias recientes"
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(embedder=NgramEmbedder(), ticker_fn=find_tickers)
+    cache.enabled = True
+    cache.store(BASE, "team", "Apple sube; noticias: ...")
+    return cache
+
+
+@pytest.mark.parametrize("query", ["analiza las acciones de Apple y sus noticias recientes",
+                                   "Analiza acciones de Apple y noticias recientes!"])
+def test_paraphrases_hit(cache, query):
+    assert cache.lookup(query, "team").answer == "Apple sube; noticias: ..."
+
+
+@pytest.mark.parametrize("query", ["Analiza acciones de Apple sin noticias recientes",
+                                   "No analices acciones de Apple + noticias recientes",
+                                   "Analiza acciones de Tesla + noticias recientes",
+                                   "Analiza acciones de Apple + noticias de 2023"])
+def test_different_meaning_misses(cache, query):
+    assert cache.lookup(query, "team") is None
+
+
+def test_mode_must_match(cache):
+    assert cache.lookup(BASE, "single") is None
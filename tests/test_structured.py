@@ -0,0 +1,59 @@
+import json
+
+from hr_agent.structured import CandidateStream, salvage_candidates
+
+
+def candidato(nombre, puntaje, **extra):
+    return {"nombre": nombre, "archivo": f"{nombre.lower()}.pdf", "puntaje": puntaje, "experiencia_anos": 3,
+            "skills": ["SQL"], "educacion": "Ingeniería", "recomendacion": "Entrevistar", **extra}
+
+
+RESPONSE = json.dumps({"candidatos": [candidato("Ana", 90), candidato("Luis", 75)]}, ensure_ascii=False)
+
+
+def test_accumulated_text_in_small_fragments():
+    stream, closed = CandidateStream(), []
+    for end in range(1, len(RESPONSE) + 1, 7):
+        closed.append([c["nombre"] for c in stream.feed(RESPONSE[:end])])
+    closed.append([c["nombre"] for c in stream.feed(RESPONSE)])
+    # Cada candidato sale una sola vez, en cuanto se cierra su objeto
+    assert [names for names in closed if names] == [["Ana"], ["Luis"]]
+    assert stream.complete
+
+
+def test_new_fragments_are_appended():
+    stream = CandidateStream()
+    chunks = [RESPONSE[i:i + 11] for i in range(0, len(RESPONSE), 11)]
+    found = [c["nombre"] for chunk in chunks for c in stream.feed(chunk)]
+    assert found == ["Ana", "Luis"]
+
+
+def test_braces_brackets_and_escaped_quotes_inside_strings():
+    tricky = candidato("Ana", 88, recomendacion='Dijo "ver {anexo}" y [pendiente] \\ revisar }]')
+    text = json.dumps({"candidatos": [tricky, candidato("Luis", 70)]}, ensure_ascii=False)
+    stream = CandidateStream()
+    records = stream.feed(text)
+    assert [c["nombre"] for c in records] == ["Ana", "Luis"]
+    assert records[0]["recomendacion"] == 'Dijo "ver {anexo}" y [pendiente] \\ revisar }]'
+    assert stream.complete
+
+
+def test_code_fence_and_bare_array():
+    fenced = "```json\n" + json.dumps([candidato("Ana", 90)]) + "\n```"
+    stream = CandidateStream()
+    assert [c["nombre"] for c in stream.feed(fenced)] == ["Ana"]
+    assert stream.complete
+
+
+def test_truncated_output_keeps_closed_objects():
+    truncated = RESPONSE[:RESPONSE.index('"Luis"') + 10]
+    stream = CandidateStream()
+    assert [c["nombre"] for c in stream.feed(truncated)] == ["Ana"]
+    assert not stream.complete
+    assert [c["nombre"] for c in salvage_candidates(truncated)] == ["Ana"]
+
+
+def test_objects_without_numeric_score_are_skipped():
+    text = json.dumps({"candidatos": [candidato("Ana", "alto"), candidato("Luis", 140)]})
+    records = CandidateStream().feed(text)
+    assert [(c["nombre"], c["puntaje"]) for c in records] == [("Luis", 100.0)]
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+
+from financial_agent.tool_cache import ToolCache
+from maps_agent.tool_cache import McpToolCache
+
+
+def test_cancelling_one_waiter_keeps_shared_fetch():
+    # Un solo hilo ocupado: la descarga compartida queda en cola, donde sí se podría cancelar
+    cache = ToolCache(max_workers=1)
+    release = threading.Event()
+
+    def fetch(symbol):
+        release.wait(5)
+        return f"precio {symbol}"
+
+    async def scenario():
+        busy = asyncio.create_task(cache.call("get_company_info", fetch, {"symbol": "MSFT"}, 60))
+        first = asyncio.create_task(cache.call("get_current_stock_price", fetch, {"symbol": "AAPL"}, 60))
+        second = asyncio.create_task(cache.call("get_current_stock_price", fetch, {"symbol": "AAPL"}, 60))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await busy
+        return await second
+
+    assert asyncio.run(scenario()) == "precio AAPL"
+    assert cache.stats["coalesced"] == 1
+    # La descarga terminó y quedó en caché para el siguiente
+    assert cache.lookup(cache.key("get_current_stock_price", {"symbol": "AAPL"})) == (True, "precio AAPL")
+
+
+def test_errors_are_not_cached():
+    cache = ToolCache(max_workers=1)
+    result = asyncio.run(cache.call("get_company_news", lambda symbol: "Error: sin red", {"symbol": "TSLA"}, 60))
+    assert result == "Error: sin red"
+    assert cache.lookup(cache.key("get_company_news", {"symbol": "TSLA"})) == (False, None)
+
+
+def test_cancelling_first_mcp_caller_keeps_shared_call():
+    cache = McpToolCache()
+    calls = []
+
+    async def geocode(address):
+        calls.append(address)
+        await asyncio.sleep(0.1)
+        return f"{address} 4.71,-74.07"
+
+    async def scenario():
+        first = asyncio.create_task(cache.call("maps_geocode", geocode, {"address": "Bogotá"}, 60))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(cache.call("maps_geocode", geocode, {"address": "Bogotá"}, 60))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "Bogotá 4.71,-74.07"
+    assert calls == ["Bogotá"]
+    assert cache.stats["coalesced"] == 1
+    assert cache.lookup(cache.key("maps_geocode", {"address": "Bogotá"})) == (True, "Bogotá 4.71,-74.07")